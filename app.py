@@ -1,15 +1,21 @@
-from flask import Flask, render_template, request, redirect, url_for, jsonify, send_file, flash
+from flask import (
+    Flask, Response, render_template, request, redirect, url_for, jsonify, send_file, flash,
+    stream_with_context, g
+)
 from config import Config
 from models import (
-    create_event, list_events, get_event, get_tweets_for_event, 
-    search_or_create_event, find_event_by_name
+    create_event, list_events, get_event, iter_tweets_for_event, 
+    search_or_create_event, find_event_by_name, aggregate_event_metrics, GRANULARITIES, bucket_start,
+    get_trends, hour_bucket
 )
-from collector import start_collection_thread
-from datetime import datetime, timedelta
-import os, csv, io
-import pandas as pd
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+from cache import SharedCache
+from exports import write_columnar, FORMATS as COLUMNAR_FORMATS
+from pubsub import get_broker, event_channel
+from scheduler import submit_collection, collection_status as get_collection_status, QueueFull
+from trends import tokenize, merge_terms
+import telemetry
+from datetime import datetime, timedelta, timezone
+import os, csv, heapq, io, json, tempfile, threading, time, zlib
 from bson.objectid import ObjectId
 
 app = Flask(__name__)
@@ -18,6 +24,41 @@ app.config.from_object(Config)
 if not os.path.exists(app.config['EXPORT_FOLDER']):
     os.makedirs(app.config['EXPORT_FOLDER'], exist_ok=True)
 
+# Shared by every worker process on this host
+metrics_cache = SharedCache("metrics", app.config['METRICS_CACHE_SIZE'])
+# Open /stream responses in this process; each holds a worker thread
+stream_slots = threading.BoundedSemaphore(app.config['SSE_MAX_STREAMS'])
+pdf_cache = SharedCache("pdf", app.config['PDF_CACHE_SIZE'])
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    # ?profile=1 profiles this request, when enabled in config
+    if app.config['PROFILING_ENABLED'] and request.args.get('profile') == '1':
+        import cProfile
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+@app.after_request
+def record_request(resp):
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        os.makedirs(app.config['PROFILE_DIR'], exist_ok=True)
+        path = os.path.join(app.config['PROFILE_DIR'], f"{request.endpoint}-{int(time.time() * 1000)}-{os.getpid()}.prof")
+        profiler.dump_stats(path)
+        resp.headers['X-Profile-Path'] = path
+    started = g.pop('request_started', None)
+    if started is not None and request.endpoint != 'prometheus_metrics':
+        telemetry.observe("eventbuzz_http_request_seconds", time.perf_counter() - started,
+                          endpoint=request.endpoint or "unmatched", status=resp.status_code)
+    return resp
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Counters and histograms of every worker process, in Prometheus text format"""
+    return Response(telemetry.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/')
 def index():
     recent_events = list_events()
@@ -60,21 +101,70 @@ def dashboard(event_id):
 def iso_to_dt(s):
     if s is None: return None
     try:
-        return datetime.fromisoformat(s)
+        dt = datetime.fromisoformat(s)
     except Exception:
         try:
             from dateutil import parser
-            return parser.isoparse(s)
+            dt = parser.isoparse(s)
         except Exception:
             return None
-
-@app.route('/api/metrics/<event_id>')
-def api_metrics(event_id):
-    """Get buzz metrics and sentiment analysis for an event"""
-    ev = get_event(event_id)
-    if not ev:
-        return jsonify({"error":"event not found"}), 404
-
+    # Mongo hands back naive UTC datetimes, so compare against the same
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+def bucket_range(first, last, granularity="hour"):
+    """Bucket starts from floor(first) to ceil(last), inclusive"""
+    step = GRANULARITIES[granularity]
+    bucket = bucket_start(first, granularity)
+    stop = bucket_start(last, granularity)
+    if stop < last:
+        stop += step
+    while bucket <= stop:
+        yield bucket
+        bucket += step
+
+def pick_resolution(first, last, max_points, finest="minute"):
+    """Finest granularity, no finer than finest, whose bucket count over first..last fits in max_points"""
+    names = list(GRANULARITIES)
+    for granularity in names[names.index(finest):]:
+        if (last - first) / GRANULARITIES[granularity] + 1 <= max_points:
+            return granularity
+    return "day"
+
+def lttb_indices(values, threshold):
+    """Indices of the points Largest-Triangle-Three-Buckets keeps from values.
+
+    Keeps the first and last points, and from each of threshold - 2 equal
+    slices the point forming the largest triangle with the previously kept
+    point and the next slice's average, so peaks and troughs survive.
+    """
+    n = len(values)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    every = (n - 2) / (threshold - 2)
+    kept = [0]
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        stop = int((i + 1) * every) + 1
+        next_stop = min(int((i + 2) * every) + 1, n)
+        # Average of the next slice (the last point for the final slice)
+        nxt = range(stop, next_stop) if stop < n - 1 else range(n - 1, n)
+        avg_x = sum(nxt) / len(nxt)
+        avg_y = sum(values[j] for j in nxt) / len(nxt)
+        best, best_area = start, -1.0
+        for j in range(start, min(stop, n - 1)):
+            area = abs((a - avg_x) * (values[j] - values[a]) - (a - j) * (avg_y - values[a]))
+            if area > best_area:
+                best, best_area = j, area
+        kept.append(best)
+        a = best
+    kept.append(n - 1)
+    return kept
+
+def event_window(ev):
+    """(start, end, pre_start, post_end) of an event; analysis covers 24h either side"""
     # If start/end times not set, use current time as reference
     start = iso_to_dt(ev.get("start_time"))
     end = iso_to_dt(ev.get("end_time"))
@@ -84,72 +174,108 @@ def api_metrics(event_id):
     if not end:
         end = datetime.utcnow() + timedelta(days=7)
     
-    pre_start = start - timedelta(hours=24)
-    post_end = end + timedelta(hours=24)
-
-    tweets = get_tweets_for_event(event_id, start=pre_start, end=post_end)
+    return start, end, start - timedelta(hours=24), end + timedelta(hours=24)
+
+def compute_event_metrics(ev, since=None, resolution="auto", max_points=None, first=None, last=None):
+    """Buzz metrics and sentiment timeseries for an event document.
+
+    The timeseries covers first..last (default: the whole analysis
+    window, 24h either side of the event), clamped to that window.
+    resolution is minute/hour/day, or auto for the finest that fits in
+    max_points over it. An explicit resolution that would need more than
+    METRICS_MAX_DOWNSAMPLE times max_points buckets falls back to the next
+    coarser one (the response's resolution says which was used), so a
+    long window never builds a per-minute series on a cache miss; narrow
+    it with first/last for minute views. A series still longer than
+    max_points is downsampled with LTTB on the volume series, keeping the same buckets
+    for every series. With since (a previous response's as_of), the
+    timeseries holds only the buckets that changed since then, unless
+    downsampling applies, in which case the full series is returned with
+    delta false. The summary is always full.
+    """
+    event_id = ev["_id"]
+    start, end, pre_start, post_end = event_window(ev)
+
+    first = max(first or pre_start, pre_start)
+    last = min(last or post_end, post_end)
+
+    max_points = max_points or app.config['METRICS_MAX_POINTS']
+    if resolution not in GRANULARITIES:
+        resolution = pick_resolution(first, last, max_points)
+    else:
+        resolution = pick_resolution(first, last, max_points * app.config['METRICS_MAX_DOWNSAMPLE'],
+                                     finest=resolution)
+    span = list(bucket_range(first, last, resolution))
+    downsample = len(span) > max_points
+    if downsample:
+        since = None
+
+    # Reads the rollups maintained at ingest, never the raw items
+    with telemetry.timed("eventbuzz_metrics_stage_seconds", stage="query"):
+        agg = aggregate_event_metrics(event_id, pre_start, start, end, post_end, since=since, granularity=resolution,
+                                      series_start=first, series_end=last)
     
-    if not tweets:
-        return jsonify({
+    if not agg["periods"]:
+        return {
             "timeseries": {"times":[], "counts":[], "positive":[], "neutral":[], "negative":[]},
-            "summary": {"total": 0, "pre": 0, "during": 0, "post": 0, "pos": 0, "neg": 0, "neu": 0}
-        })
-    
-    df = pd.DataFrame([{
-        "created_at": t.get("created_at"),
-        "sentiment": t.get("sentiment"),
-        "polarity": t.get("polarity", 0),
-        "platform": t.get("platform", "unknown"),
-    } for t in tweets])
-
-    df['created_at'] = pd.to_datetime(df['created_at'])
-    df.set_index('created_at', inplace=True)
-
-    # FIX: Floor the start/end times to hour boundaries to match resample output
-    # This prevents the reindex from dropping all data due to microsecond mismatch
-    pre_start_floor = pd.Timestamp(pre_start).floor('1H')
-    post_end_ceil = pd.Timestamp(post_end).ceil('1H')
+            "summary": {"total": 0, "pre": 0, "during": 0, "post": 0, "pos": 0, "neg": 0, "neu": 0},
+            "resolution": resolution,
+            "downsampled": False,
+            "delta": since is not None,
+            "as_of": None
+        }
+
+    empty = {"count": 0, "positive": 0, "negative": 0, "neutral": 0}
+    if since is not None:
+        # Only the changed buckets; the client patches them into its charts
+        buckets = [(b["_id"], b) for b in agg["buckets"]]
+    else:
+        by_time = {b["_id"]: b for b in agg["buckets"]}
+        buckets = [(bucket, by_time.get(bucket, empty)) for bucket in span]
+    if downsample:
+        with telemetry.timed("eventbuzz_metrics_stage_seconds", stage="downsample"):
+            buckets = [buckets[i] for i in lttb_indices([b["count"] for _, b in buckets], max_points)]
 
-    counts = df.resample('1H').size().rename("count")
-    counts = counts.reindex(pd.date_range(pre_start_floor, post_end_ceil, freq='1H'), fill_value=0)
+    times, counts, pos, neg, neu = [], [], [], [], []
+    for bucket, b in buckets:
+        times.append(bucket.isoformat())
+        counts.append(b["count"])
+        pos.append(b["positive"])
+        neg.append(b["negative"])
+        neu.append(b["neutral"])
 
-    pos = df[df.sentiment=="positive"].resample('1H').size().reindex(counts.index, fill_value=0)
-    neg = df[df.sentiment=="negative"].resample('1H').size().reindex(counts.index, fill_value=0)
-    neu = df[df.sentiment=="neutral"].resample('1H').size().reindex(counts.index, fill_value=0)
+    periods = {p["_id"]: p for p in agg["periods"]}
 
-    times = [ts.isoformat() for ts in counts.index]
+    def period_count(name):
+        return periods.get(name, {}).get("count", 0)
 
-    total = len(df)
-    pre_count = df.loc[pre_start:start - timedelta(seconds=1)].shape[0] if df.index.min() <= pre_start else 0
-    during_count = df.loc[start:end].shape[0] if (df.index.min() <= end and df.index.max() >= start) else 0
-    post_count = df.loc[end + timedelta(seconds=1):post_end].shape[0] if df.index.max() >= end else 0
+    def mean_pol(name):
+        p = periods.get(name)
+        return float(p["polarity_sum"]) / p["count"] if p and p["count"] else 0.0
 
-    pos_total = pos.sum()
-    neg_total = neg.sum()
-    neu_total = neu.sum()
+    def label_total(label):
+        return sum(p[label] for p in periods.values())
 
-    def mean_pol(a, b):
-        try:
-            s = df.loc[a:b]['polarity']
-            return float(s.mean()) if not s.empty else 0.0
-        except:
-            return 0.0
+    pre_count = period_count("pre")
+    during_count = period_count("during")
+    post_count = period_count("post")
+    total = pre_count + during_count + post_count
 
-    pre_pol = mean_pol(pre_start, start - timedelta(seconds=1))
-    during_pol = mean_pol(start, end)
-    post_pol = mean_pol(end + timedelta(seconds=1), post_end)
+    pre_pol = mean_pol("pre")
+    during_pol = mean_pol("during")
+    post_pol = mean_pol("post")
 
     # Get platform breakdown
-    platform_counts = df['platform'].value_counts().to_dict()
+    platform_counts = {p["_id"]: p["count"] for p in agg["platforms"]}
 
     summary = {
         "total": int(total),
         "pre": int(pre_count),
         "during": int(during_count),
         "post": int(post_count),
-        "pos": int(pos_total),
-        "neg": int(neg_total),
-        "neu": int(neu_total),
+        "pos": int(label_total("positive")),
+        "neg": int(label_total("negative")),
+        "neu": int(label_total("neutral")),
         "pre_polarity": round(pre_pol, 4),
         "during_polarity": round(during_pol, 4),
         "post_polarity": round(post_pol, 4),
@@ -157,15 +283,106 @@ def api_metrics(event_id):
         "buzz_score": calculate_buzz_score(total, during_pol, pre_count, during_count, post_count)
     }
 
-    return jsonify({
+    return {
         "timeseries": {
             "times": times,
-            "counts": counts.tolist(),
-            "positive": pos.tolist(),
-            "negative": neg.tolist(),
-            "neutral": neu.tolist()
+            "counts": counts,
+            "positive": pos,
+            "negative": neg,
+            "neutral": neu
         },
-        "summary": summary
+        "summary": summary,
+        "resolution": resolution,
+        "downsampled": downsample,
+        "delta": since is not None,
+        "as_of": agg["as_of"].isoformat() if agg["as_of"] else None
+    }
+
+def data_version_key(ev):
+    """Changes whenever ingestion touches the event's items"""
+    return f"{ev['_id']}-{ev.get('data_version', 0)}"
+
+@app.route('/api/metrics/<event_id>')
+def api_metrics(event_id):
+    """Get buzz metrics and sentiment analysis for an event.
+
+    ?start=&end= narrow the timeseries (not the summary), e.g. to view a day at minute resolution.
+    """
+    ev = get_event(event_id)
+    if not ev:
+        return jsonify({"error":"event not found"}), 404
+
+    # ?since=<as_of> asks only for the buckets changed since a previous response
+    since = iso_to_dt(request.args.get('since'))
+    resolution = request.args.get('resolution', 'auto')
+    if resolution != 'auto' and resolution not in GRANULARITIES:
+        return jsonify({"error": f"resolution must be auto or one of {', '.join(GRANULARITIES)}"}), 400
+    max_points = request.args.get('max_points', type=int)
+    if max_points is not None and not 3 <= max_points <= app.config['METRICS_MAX_POINTS']:
+        return jsonify({"error": f"max_points must be between 3 and {app.config['METRICS_MAX_POINTS']}"}), 400
+    first = iso_to_dt(request.args.get('start'))
+    last = iso_to_dt(request.args.get('end'))
+    if first and last and first >= last:
+        return jsonify({"error": "start must be before end"}), 400
+
+    # Unchanged data: the browser revalidates with If-None-Match and gets a 304
+    etag = f"{data_version_key(ev)}-{resolution}-{max_points or app.config['METRICS_MAX_POINTS']}"
+    if first or last:
+        etag += f"-window-{first.isoformat() if first else ''}-{last.isoformat() if last else ''}"
+    if since is not None:
+        etag += f"-since-{since.isoformat()}"
+    if request.if_none_match.contains(etag):
+        telemetry.inc("eventbuzz_metrics_cache_total", outcome="not_modified")
+        resp = Response(status=304)
+    else:
+        with telemetry.timed("eventbuzz_metrics_stage_seconds", stage="cache_read"):
+            body = metrics_cache.get(etag)
+        if body is None:
+            telemetry.inc("eventbuzz_metrics_cache_total", outcome="miss")
+            with telemetry.timed("eventbuzz_metrics_stage_seconds", stage="compute"):
+                metrics = compute_event_metrics(ev, since=since, resolution=resolution, max_points=max_points,
+                                                first=first, last=last)
+            with telemetry.timed("eventbuzz_metrics_stage_seconds", stage="serialize"):
+                body = app.json.dumps(metrics).encode('utf-8')
+            metrics_cache.put(etag, body)
+        else:
+            telemetry.inc("eventbuzz_metrics_cache_total", outcome="hit")
+        resp = Response(body, mimetype='application/json')
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
+@app.route('/api/trends/<event_id>')
+def api_trends(event_id):
+    """Trending terms and top posts per hour, read from the sketches kept at ingest"""
+    ev = get_event(event_id)
+    if not ev:
+        return jsonify({"error":"event not found"}), 404
+
+    _, _, pre_start, post_end = event_window(ev)
+    first = iso_to_dt(request.args.get('start')) or pre_start
+    last = iso_to_dt(request.args.get('end')) or post_end
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    per_hour = min(max(request.args.get('per_hour', 5, type=int), 0), limit)
+
+    docs = get_trends(event_id, hour_bucket(first), last)
+    # The event's own name is in nearly every item, so it never "trends"
+    exclude = set(tokenize(ev.get("name")))
+
+    def post_out(post):
+        return dict(post, created_at=post["created_at"].isoformat() if post.get("created_at") else None)
+
+    posts = [p for d in docs for p in d.get("top_posts", [])]
+    top_posts = heapq.nlargest(app.config['TRENDS_TOP_POSTS'], posts, key=lambda p: (p["score"], p["num_comments"]))
+    return jsonify({
+        "terms": merge_terms((d.get("terms") for d in docs), limit, exclude),
+        "hourly": [
+            {"bucket": d["bucket"].isoformat(), "terms": merge_terms([d.get("terms")], per_hour, exclude)}
+            for d in docs
+        ],
+        "top_posts": [post_out(p) for p in top_posts],
+        "start": first.isoformat(),
+        "end": last.isoformat(),
     })
 
 def calculate_buzz_score(total, sentiment_polarity, pre_count, during_count, post_count):
@@ -188,51 +405,152 @@ def calculate_buzz_score(total, sentiment_polarity, pre_count, during_count, pos
 
 @app.route('/start_collection/<event_id>', methods=['POST'])
 def start_collection(event_id):
-    """Start collecting data for an event"""
+    """Queue a collection for an event, or attach to the one already in flight.
+
+    ?full=1 ignores the event's watermarks and re-collects its whole window.
+    """
     ev = get_event(event_id)
     if not ev:
         return jsonify({"error":"event not found"}), 404
     try:
-        start_collection_thread(event_id)
-        return jsonify({"status":"started"})
+        job, created = submit_collection(event_id, full=request.args.get("full") == "1")
+        return jsonify({"status":"started", "attached": not created, "job": job})
+    except QueueFull as e:
+        resp = jsonify({"error": str(e)})
+        resp.headers["Retry-After"] = "30"
+        return resp, 429
     except Exception as e:
         print(f"Error starting collection: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/collection_status/<event_id>')
+def collection_status(event_id):
+    """Status of the latest collection job for an event, with per-source progress"""
+    job = get_collection_status(event_id)
+    if not job:
+        return jsonify({"error":"no collection job for event"}), 404
+    return jsonify(job)
+
+CSV_COLUMNS = ["platform","text","created_at","sentiment","polarity"]
+
+def iter_csv(event_id, chunk_rows=500):
+    """CSV text for an event, yielded every chunk_rows rows"""
+    buf = io.StringIO()
+    cw = csv.writer(buf)
+    cw.writerow(CSV_COLUMNS)
+    for i, t in enumerate(iter_tweets_for_event(event_id, CSV_COLUMNS), 1):
+        cw.writerow([t.get(c) for c in CSV_COLUMNS])
+        if i % chunk_rows == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+@app.route('/stream/<event_id>')
+def stream(event_id):
+    """Server-Sent Events: collection progress and metric deltas for an event.
+
+    Over SSE_MAX_STREAMS open streams, answers 204, which stops EventSource
+    from reconnecting; that dashboard keeps polling instead, so streams
+    can't take every worker thread.
+    """
+    if not app.config['SSE_ENABLED']:
+        return jsonify({"error":"live updates are disabled"}), 404
+    ev = get_event(event_id)
+    if not ev:
+        return jsonify({"error":"event not found"}), 404
+    if not stream_slots.acquire(blocking=False):
+        return Response(status=204)
+
+    try:
+        broker = get_broker()
+        sub = broker.subscribe(event_channel(event_id))
+    except Exception:
+        stream_slots.release()
+        raise
+
+    def generate():
+        try:
+            yield "retry: 5000\n\n"
+            # An in-process broker misses collections running in other processes,
+            # so the client keeps polling unless every publisher can reach it
+            yield f"event: hello\ndata: {json.dumps({'cross_process': broker.cross_process})}\n\n"
+            # Bounded so a sync worker isn't held forever; EventSource reconnects
+            deadline = time.monotonic() + app.config['SSE_MAX_SECONDS']
+            while time.monotonic() < deadline:
+                message = sub.get(timeout=app.config['SSE_HEARTBEAT_SECONDS'])
+                if message is None:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {message.get('type', 'message')}\ndata: {json.dumps(message)}\n\n"
+        finally:
+            sub.close()
+
+    resp = Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Runs when the server closes the response, even if the generator never started
+    resp.call_on_close(stream_slots.release)
+    return resp
+
 @app.route('/export/csv/<event_id>')
 def export_csv(event_id):
-    """Export event data as CSV"""
+    """Export event data as CSV, streamed straight from the database cursor"""
     ev = get_event(event_id)
     if not ev:
         flash("Event not found", "danger")
         return redirect(url_for('index'))
 
-    tweets = get_tweets_for_event(event_id)
-    si = io.StringIO()
-    cw = csv.writer(si)
-    cw.writerow(["platform","text","created_at","sentiment","polarity"])
-    for t in tweets:
-        cw.writerow([t.get('platform'), t.get('text'), t.get('created_at'), t.get('sentiment'), t.get('polarity')])
-    mem = io.BytesIO()
-    mem.write(si.getvalue().encode('utf-8'))
-    mem.seek(0)
-    filename = f"event_{event_id}_data.csv"
-    return send_file(mem, as_attachment=True, download_name=filename, mimetype='text/csv')
+    body = (chunk.encode('utf-8') for chunk in iter_csv(event_id))
+    use_gzip = app.config['EXPORT_GZIP'] and 'gzip' in request.headers.get('Accept-Encoding', '')
+    if use_gzip:
+        body = gzip_chunks(body)
 
-@app.route('/export/pdf/<event_id>')
-def export_pdf(event_id):
-    """Export event summary as PDF"""
+    filename = f"event_{event_id}_data.csv"
+    resp = Response(stream_with_context(body), mimetype='text/csv')
+    resp.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    resp.headers['Vary'] = 'Accept-Encoding'
+    if use_gzip:
+        resp.headers['Content-Encoding'] = 'gzip'
+    return resp
+
+@app.route('/export/parquet/<event_id>', defaults={'fmt': 'parquet'})
+@app.route('/export/arrow/<event_id>', defaults={'fmt': 'arrow'})
+def export_columnar(event_id, fmt):
+    """Export event data as typed Parquet or Arrow IPC, written in row-group chunks"""
     ev = get_event(event_id)
     if not ev:
         flash("Event not found", "danger")
         return redirect(url_for('index'))
 
-    api_resp = app.test_client().get(url_for('api_metrics', event_id=event_id))
-    data = api_resp.get_json()
-    metrics = data.get("summary", {})
-    
-    filename = os.path.join(app.config['EXPORT_FOLDER'], f"event_{event_id}_summary.pdf")
-    c = canvas.Canvas(filename, pagesize=letter)
+    # Parquet needs its footer written last, so spool to memory and spill to disk when large
+    spool = tempfile.SpooledTemporaryFile(max_size=app.config['EXPORT_SPOOL_BYTES'], dir=app.config['EXPORT_FOLDER'])
+    try:
+        write_columnar(event_id, fmt, spool)
+    except Exception:
+        spool.close()
+        raise
+    spool.seek(0)
+    info = COLUMNAR_FORMATS[fmt]
+    filename = f"event_{event_id}_data.{info['extension']}"
+    return send_file(spool, as_attachment=True, download_name=filename, mimetype=info['mimetype'])
+
+
+def render_summary_pdf(ev, metrics):
+    """Render the event summary report into PDF bytes"""
+    # reportlab is only needed here, so it isn't loaded into every worker at boot
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=letter)
     width, height = letter
     
     c.setFont("Helvetica-Bold", 16)
@@ -268,7 +586,24 @@ def export_pdf(event_id):
             y = height - 40
 
     c.save()
-    return send_file(filename, as_attachment=True, download_name=os.path.basename(filename))
+    return buf.getvalue()
+
+@app.route('/export/pdf/<event_id>')
+def export_pdf(event_id):
+    """Export event summary as PDF, reusing the last render while the data is unchanged"""
+    ev = get_event(event_id)
+    if not ev:
+        flash("Event not found", "danger")
+        return redirect(url_for('index'))
+
+    key = data_version_key(ev)
+    pdf = pdf_cache.get(key)
+    if pdf is None:
+        pdf = render_summary_pdf(ev, compute_event_metrics(ev)["summary"])
+        pdf_cache.put(key, pdf)
+
+    return send_file(io.BytesIO(pdf), as_attachment=True, download_name=f"event_{event_id}_summary.pdf",
+                     mimetype='application/pdf')
 
 def get_recommendations(metrics):
     """Generate recommendations based on metrics"""
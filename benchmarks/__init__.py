@@ -0,0 +1,7 @@
+"""Performance benchmarks for the ingest, metrics, export and sentiment paths.
+
+Run with `python -m benchmarks.run --help`. They need a local mongod and
+write into a dedicated benchmark database that is dropped between runs.
+`python -m benchmarks.startup` checks cold import time and RSS of the
+entry points and needs no database.
+"""
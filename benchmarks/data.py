@@ -0,0 +1,88 @@
+"""Deterministic synthetic items shaped like the collectors' output"""
+import random
+from datetime import datetime, timedelta
+
+from sentiment import label_for
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+# Roughly the mix a collection produces: mostly Reddit, a page or two of videos, daily news points
+PLATFORM_WEIGHTS = [("reddit", 0.8), ("youtube", 0.19), ("news", 0.01)]
+
+SUBJECTS = ["the launch", "the keynote", "the final", "the release", "the announcement", "the match", "the update"]
+OPINIONS = [
+    "was absolutely amazing", "looks great so far", "is pretty good honestly", "was fine I guess",
+    "is okay", "felt a bit boring", "was really disappointing", "is terrible and broken", "was awful",
+]
+TAILS = ["", "can't wait for more", "what do you all think?", "thread below", "watch the full video", "source in comments"]
+# Share of generate_texts() output that repeats an earlier text verbatim; the rest is unique
+REPOST_RATIO = 0.2
+
+def event_window(now=None):
+    """A three-day event ending yesterday, as create_event would store it"""
+    now = (now or datetime.utcnow()).replace(minute=0, second=0, microsecond=0)
+    start = now - timedelta(days=4)
+    end = now - timedelta(days=1)
+    return start, end
+
+def _created_at(rng, start, end):
+    # Most chatter during the event, tails of it in the 24h either side
+    pre_start, post_end = start - timedelta(hours=24), end + timedelta(hours=24)
+    r = rng.random()
+    if r < 0.15:
+        lo, hi = pre_start, start
+    elif r < 0.85:
+        lo, hi = start, end
+    else:
+        lo, hi = end, post_end
+    return lo + timedelta(seconds=rng.uniform(0, (hi - lo).total_seconds()))
+
+def _text(rng):
+    return " ".join(filter(None, [rng.choice(SUBJECTS).capitalize(), rng.choice(OPINIONS), rng.choice(TAILS)]))
+
+def generate_items(event_id, count, start, end, seed=0):
+    """Yield count item docs for event_id, scored with a synthetic polarity.
+
+    The same seed always yields the same items, so runs are comparable.
+    """
+    rng = random.Random(seed)
+    platforms, weights = zip(*PLATFORM_WEIGHTS)
+    news_day = start.date() - timedelta(days=1)
+    for i in range(count):
+        platform = rng.choices(platforms, weights)[0]
+        created = _created_at(rng, start, end)
+        polarity = round(rng.uniform(-1, 1) * rng.random(), 4)
+        doc = {
+            "event_id": event_id,
+            "platform": platform,
+            "text": _text(rng),
+            "created_at": created,
+            "sentiment": label_for(polarity),
+            "polarity": polarity,
+        }
+        if platform == "reddit":
+            doc.update(external_id=f"r{i:x}", source="reddit_submission",
+                       metrics={"score": rng.randint(0, 5000), "num_comments": rng.randint(0, 800)})
+        elif platform == "youtube":
+            video_id = f"v{i:010x}"
+            doc.update(external_id=video_id, source="youtube_video", metrics={"video_id": video_id})
+        else:
+            news_day += timedelta(days=1)
+            doc.update(external_id=f"{news_day:%Y%m%d}-{i}", source="gdelt_summary",
+                       metrics={"news_count": rng.randint(10, 2000)})
+        yield doc
+
+def generate_texts(count, seed=0, repost_ratio=REPOST_RATIO):
+    """count item texts, repost_ratio of them exact repeats of an earlier one (reposts, quoted titles).
+
+    The others carry a per-item post number, so the 378 phrase combinations
+    don't turn a sentiment benchmark into a cache benchmark.
+    """
+    rng = random.Random(seed)
+    texts = []
+    for i in range(count):
+        if texts and rng.random() < repost_ratio:
+            texts.append(rng.choice(texts))
+        else:
+            texts.append(f"{_text(rng)} (post {seed}-{i})")
+    return texts
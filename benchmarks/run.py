@@ -0,0 +1,266 @@
+"""Benchmark the hot paths against a local mongod and write the results as JSON.
+
+    python -m benchmarks.run --scale 100k --output bench-100k.json
+    python -m benchmarks.run --scale 100k --baseline bench-100k.json
+
+Stages: ingest (BulkWriter + rollups), metrics (compute_event_metrics and
+/api/metrics through the Flask test client), CSV and PDF export, and
+sentiment scoring with a cold and a warm cache. Each stage records its timings and the process peak
+RSS after it ran; RSS is a high-water mark, so a stage's figure includes
+every stage before it. The benchmark database is dropped before loading,
+so --mongo-uri must name a database with "bench" in it.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from pymongo.uri_parser import parse_uri
+
+from benchmarks.data import SCALES, REPOST_RATIO, event_window, generate_items, generate_texts
+
+# Direction of improvement for every reported figure
+METRICS = {
+    "ingest_items_per_second": "higher",
+    "metrics_compute_p50_ms": "lower",
+    "metrics_compute_p95_ms": "lower",
+    "api_metrics_p50_ms": "lower",
+    "api_metrics_p95_ms": "lower",
+    "api_metrics_304_p50_ms": "lower",
+    "export_csv_seconds": "lower",
+    "export_csv_rows_per_second": "higher",
+    "export_pdf_seconds": "lower",
+    "sentiment_cold_items_per_second": "higher",
+    "sentiment_warm_items_per_second": "higher",
+    "analyze_sentiment_items_per_second": "higher",
+    "peak_rss_mb": "lower",
+}
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)]
+
+def timed_samples(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def bench_ingest(models, event_id, count, start, end, seed):
+    started = time.perf_counter()
+    with models.BulkWriter("bench") as writer:
+        for doc in generate_items(event_id, count, start, end, seed):
+            writer.add(doc)
+    elapsed = time.perf_counter() - started
+    return {
+        "ingest_seconds": round(elapsed, 3),
+        "ingest_items_per_second": round(count / elapsed, 1),
+        "ingest_writes": len(writer.flush_counts),
+    }
+
+def bench_metrics(app_module, event_id, repeat):
+    ev = app_module.get_event(event_id)
+    compute = timed_samples(lambda: app_module.compute_event_metrics(ev), repeat)
+
+    client = app_module.app.test_client()
+    url = f"/api/metrics/{event_id}"
+    first = client.get(url)
+    etag = first.headers.get("ETag")
+    # Served from the shared cache after the first request
+    cached = timed_samples(lambda: client.get(url).get_data(), repeat)
+    revalidated = timed_samples(lambda: client.get(url, headers={"If-None-Match": etag}), repeat)
+    return {
+        "metrics_points": len(first.get_json()["timeseries"]["times"]),
+        "metrics_compute_p50_ms": round(statistics.median(compute), 2),
+        "metrics_compute_p95_ms": round(percentile(compute, 95), 2),
+        "api_metrics_p50_ms": round(statistics.median(cached), 2),
+        "api_metrics_p95_ms": round(percentile(cached, 95), 2),
+        "api_metrics_304_p50_ms": round(statistics.median(revalidated), 2),
+    }
+
+def bench_exports(app_module, event_id, count):
+    client = app_module.app.test_client()
+
+    started = time.perf_counter()
+    resp = client.get(f"/export/csv/{event_id}")
+    size = sum(len(chunk) for chunk in resp.response)
+    resp.close()
+    csv_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    client.get(f"/export/pdf/{event_id}").get_data()
+    pdf_seconds = time.perf_counter() - started
+    return {
+        "export_csv_seconds": round(csv_seconds, 3),
+        "export_csv_rows_per_second": round(count / csv_seconds, 1),
+        "export_csv_bytes": size,
+        "export_pdf_seconds": round(pdf_seconds, 3),
+    }
+
+def bench_sentiment(count, seed):
+    from collector import analyze_sentiment
+    from sentiment import SentimentEngine, get_engine
+
+    def score_all(engine, texts):
+        started = time.perf_counter()
+        for i in range(0, len(texts), engine.batch_size):
+            engine.score_batch(texts[i:i + engine.batch_size])
+        return time.perf_counter() - started
+
+    texts = generate_texts(count, seed)
+    engine = SentimentEngine(cache_size=max(count, 1))
+    try:
+        # Start the pool outside the timed passes
+        score_all(engine, generate_texts(engine.batch_size, seed + 2, repost_ratio=0))
+        before = engine.stats()
+        # Cold: only the in-run reposts hit the cache. Warm: the same texts again, all hits
+        cold = score_all(engine, texts)
+        after = engine.stats()
+        warm = score_all(engine, texts)
+    finally:
+        engine.shutdown()
+    lookups = (after["hits"] + after["misses"]) - (before["hits"] + before["misses"])
+
+    # One item at a time through the process-wide engine, as the old collectors did
+    sample = generate_texts(min(count, 5000), seed + 1)
+    started = time.perf_counter()
+    for text in sample:
+        analyze_sentiment(text)
+    single = time.perf_counter() - started
+    get_engine().shutdown()
+    return {
+        "sentiment_repost_ratio": REPOST_RATIO,
+        "sentiment_cold_items_per_second": round(len(texts) / cold, 1),
+        "sentiment_cold_cache_hit_rate": round((after["hits"] - before["hits"]) / lookups, 4) if lookups else 0.0,
+        "sentiment_warm_items_per_second": round(len(texts) / warm, 1),
+        "analyze_sentiment_items_per_second": round(len(sample) / single, 1),
+    }
+
+def compare(results, baseline, tolerance):
+    """Per-metric change against baseline; returns the names that regressed beyond tolerance"""
+    regressions = []
+    print(f"\n{'metric':<38}{'baseline':>14}{'current':>14}{'change':>10}")
+    for name, better in METRICS.items():
+        old, new = baseline.get(name), results.get(name)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        worse = change < -tolerance if better == "higher" else change > tolerance
+        flag = "  ✗" if worse else ""
+        print(f"{name:<38}{old:>14}{new:>14}{change:>+10.1%}{flag}")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="10k", help="Number of synthetic items")
+    parser.add_argument("--mongo-uri", default=os.getenv("BENCH_MONGO_URI", "mongodb://localhost:27017/eventbuzz_bench"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=50, help="Requests per latency measurement")
+    parser.add_argument("--stages", default="ingest,metrics,exports,sentiment")
+    parser.add_argument("--output", help="Write results JSON here (default: stdout only)")
+    parser.add_argument("--baseline", help="Results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative regression")
+    args = parser.parse_args(argv)
+
+    database = parse_uri(args.mongo_uri).get("database") or ""
+    if "bench" not in database:
+        parser.error(f"refusing to drop database {database!r}: its name must contain 'bench'")
+
+    # Config reads the environment at import, so point it at the benchmark database first
+    os.environ["MONGO_URI"] = args.mongo_uri
+    scratch = tempfile.mkdtemp(prefix="eventbuzz-bench-")
+    os.environ["CACHE_PATH"] = os.path.join(scratch, "cache.sqlite3")
+    os.environ["METRICS_DIR"] = os.path.join(scratch, "metrics")
+    import models
+
+    stages = set(args.stages.split(","))
+    count = SCALES[args.scale]
+    results = {}
+    started = time.perf_counter()
+
+    db = models._get_connection()
+    db.client.drop_database(database)
+    models.ensure_indexes(db)
+    start, end = event_window()
+    event_id = models.create_event({
+        "name": f"Benchmark {args.scale}", "start_time": start.isoformat(), "end_time": end.isoformat(),
+    })
+
+    if "ingest" in stages:
+        results.update(bench_ingest(models, event_id, count, start, end, args.seed))
+        results["ingest_peak_rss_mb"] = peak_rss_mb()
+        print(f"ingest: {results['ingest_items_per_second']} items/s")
+    if stages & {"metrics", "exports"}:
+        import app as app_module
+        if "metrics" in stages:
+            results.update(bench_metrics(app_module, event_id, args.repeat))
+            results["metrics_peak_rss_mb"] = peak_rss_mb()
+            print(f"metrics: p50 {results['metrics_compute_p50_ms']} ms, p95 {results['metrics_compute_p95_ms']} ms")
+        if "exports" in stages:
+            results.update(bench_exports(app_module, event_id, count))
+            results["exports_peak_rss_mb"] = peak_rss_mb()
+            print(f"exports: csv {results['export_csv_seconds']} s, pdf {results['export_pdf_seconds']} s")
+    if "sentiment" in stages:
+        results.update(bench_sentiment(count, args.seed))
+        results["sentiment_peak_rss_mb"] = peak_rss_mb()
+        print(f"sentiment: {results['sentiment_cold_items_per_second']} items/s cold, "
+              f"{results['sentiment_warm_items_per_second']} items/s warm")
+    results["peak_rss_mb"] = peak_rss_mb()
+
+    report = {
+        "meta": {
+            "scale": args.scale,
+            "items": count,
+            "seed": args.seed,
+            "stages": sorted(stages),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "run_at": datetime.utcnow().isoformat(),
+            "duration_seconds": round(time.perf_counter() - started, 1),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Results written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["meta"]["scale"] != args.scale:
+            print(f"⚠️  Baseline is at scale {baseline['meta']['scale']}, this run is {args.scale}")
+        regressions = compare(results, baseline["results"], args.tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} regressions beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""Measure cold import of the web and worker entry points.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --output startup.json --baseline startup-baseline.json
+
+Each module is imported in a fresh interpreter under -X importtime. The
+report covers the total import time, the slowest modules, the RSS
+afterwards, and which heavy libraries got loaded. It exits non-zero when
+an entry point loads a library it is meant to defer, or when --baseline
+shows a regression beyond --tolerance. No database is needed: importing
+must not connect.
+"""
+import argparse
+import json
+import re
+import subprocess
+import sys
+
+# Libraries only some code paths need; importing the module must not load them
+ENTRY_POINTS = {
+    "app": ["reportlab", "praw", "googleapiclient", "textblob", "nltk", "pandas", "pyarrow", "requests"],
+    "collector": ["reportlab", "praw", "googleapiclient", "textblob", "nltk", "pandas", "pyarrow"],
+}
+
+_PROBE = """
+import sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+import json, resource
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{
+    "seconds": elapsed,
+    "rss_mb": rss / (1024 * 1024 if sys.platform == "darwin" else 1024),
+    "loaded": sorted(m for m in {heavy!r} if m in sys.modules),
+}}))
+"""
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+def measure(module, heavy, top=10):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module, heavy=heavy)],
+        capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{proc.stderr[-2000:]}")
+    probe = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    # Children are listed (indented) before their parent, so the module's direct
+    # imports are the depth-1 entries between the previous top-level entry and its own
+    children = {}
+    for self_us, cumulative_us, indent, name in _IMPORTTIME.findall(proc.stderr):
+        depth = (len(indent) - 1) // 2
+        if depth == 0:
+            if name == module:
+                break
+            children = {}
+        elif depth == 1:
+            children[name] = int(cumulative_us)
+    slowest = sorted(children.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    return {
+        "import_seconds": round(probe["seconds"], 3),
+        "rss_mb": round(probe["rss_mb"], 1),
+        "heavy_loaded": probe["loaded"],
+        "slowest_ms": {name: round(us / 1000, 1) for name, us in slowest},
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.20, help="Allowed relative regression")
+    args = parser.parse_args(argv)
+
+    results, failures = {}, []
+    for module, heavy in ENTRY_POINTS.items():
+        r = results[module] = measure(module, heavy)
+        print(f"{module}: {r['import_seconds']} s, {r['rss_mb']} MB RSS")
+        for name, ms in r["slowest_ms"].items():
+            print(f"    {name:<40}{ms:>10} ms")
+        if r["heavy_loaded"]:
+            failures.append(f"{module} loads {', '.join(r['heavy_loaded'])} at import")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        for module, r in results.items():
+            for key in ("import_seconds", "rss_mb"):
+                old = baseline.get(module, {}).get(key)
+                if old and (r[key] - old) / old > args.tolerance:
+                    failures.append(f"{module} {key} {old} → {r[key]}")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
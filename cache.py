@@ -0,0 +1,61 @@
+import os
+import sqlite3
+import threading
+import time
+
+from config import Config
+
+class SharedCache:
+    """Bounded LRU of bytes values in a local SQLite file.
+
+    Every gunicorn worker on the host opens the same file, so a value
+    computed by one worker is served by all of them. Least recently read
+    entries are evicted once the table holds more than max_entries.
+    Cache errors are logged and treated as misses.
+    """
+
+    def __init__(self, table, max_entries, path=None):
+        self.table = table
+        self.max_entries = max_entries
+        self.path = path or Config.CACHE_PATH
+        self._local = threading.local()
+
+    def _conn(self):
+        # sqlite connections can't cross threads or forks, so keep one per thread per process
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key):
+        try:
+            conn = self._conn()
+            row = conn.execute(f"SELECT value FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute(f"UPDATE {self.table} SET accessed = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+        except sqlite3.Error as e:
+            print(f"⚠️  Cache read failed ({self.table}): {e}")
+            return None
+
+    def put(self, key, value):
+        try:
+            conn = self._conn()
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, accessed) VALUES (?, ?, ?)",
+                (key, value, time.time()),
+            )
+            conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+        except sqlite3.Error as e:
+            print(f"⚠️  Cache write failed ({self.table}): {e}")
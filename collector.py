@@ -1,114 +1,338 @@
+import json
+import os
+import socket
 import threading
 import time
 import traceback
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from datetime import datetime, timedelta
-import requests
-from textblob import TextBlob
 
 from config import Config
-from models import save_tweet, get_event
+import telemetry
+from models import (
+    BulkWriter, get_event, claim_job, heartbeat_job, finish_job, hour_bucket, SENTIMENT_LABELS,
+    get_watermarks, advance_watermark, save_backfill
+)
+from pubsub import publish
+from sentiment import get_engine
+from trends import record_trends
 
-import praw
-from googleapiclient.discovery import build
+# praw, googleapiclient and requests are imported on first use, so the web
+# process (which only queues jobs) never loads them
+
+# What a fetcher reports: items seen, and how many of those were new or changed
+EMPTY_FETCH = {"count": 0, "inserted": 0, "updated": 0}
+
+### API clients (built once per process, reused by every collection)
+class ClientRegistry:
+    """Lazily built API clients, reused across collections.
+
+    praw and googleapiclient clients hold non-thread-safe HTTP state, so
+    they are checked out exclusively and returned to a free list after
+    use; concurrent fetches only build a second client when one is
+    already in use. The requests session is thread-safe and shared.
+    Everything is dropped in a forked child, since sockets must not be
+    shared across processes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._free = {}
+        self._session = None
+        self._pid = os.getpid()
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            self.reset()
+
+    @contextmanager
+    def _borrow(self, name, factory):
+        with self._lock:
+            self._check_pid()
+            free = self._free.setdefault(name, [])
+            client = free.pop() if free else None
+        if client is None:
+            client = factory()
+        try:
+            yield client
+        finally:
+            with self._lock:
+                self._free.setdefault(name, []).append(client)
+
+    def reddit(self):
+        import praw
+        return self._borrow("reddit", lambda: praw.Reddit(
+            client_id=Config.REDDIT_CLIENT_ID,
+            client_secret=Config.REDDIT_CLIENT_SECRET,
+            user_agent=Config.REDDIT_USER_AGENT
+        ))
+
+    def youtube(self):
+        from googleapiclient.discovery import build
+        return self._borrow("youtube", lambda: build(
+            "youtube", "v3", developerKey=Config.YOUTUBE_API_KEY, cache_discovery=False
+        ))
+
+    def session(self):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        with self._lock:
+            self._check_pid()
+            if self._session is None:
+                retry = Retry(
+                    total=Config.HTTP_RETRIES,
+                    backoff_factor=Config.HTTP_BACKOFF_SECONDS,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=frozenset(["GET"]),
+                    respect_retry_after_header=True,
+                )
+                adapter = HTTPAdapter(pool_connections=Config.HTTP_POOL_SIZE,
+                                      pool_maxsize=Config.HTTP_POOL_SIZE, max_retries=retry)
+                session = requests.Session()
+                session.headers["User-Agent"] = Config.REDDIT_USER_AGENT
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+            return self._session
+
+clients = ClientRegistry()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=clients.reset)
 
 ### Helper functions
 def analyze_sentiment(text):
-    blob = TextBlob(text)
-    polarity = round(blob.sentiment.polarity, 4)
-    if polarity > 0.05:
-        label = "positive"
-    elif polarity < -0.05:
-        label = "negative"
-    else:
-        label = "neutral"
-    return {"polarity": polarity, "label": label}
-
-def reddit_fetch(event_id, query, after, before, limit=200):
+    return get_engine().score(text)
+
+def ingest_scored(writer, docs):
+    """Score a batch of item docs in one engine call and hand them to the writer"""
+    with telemetry.timed("eventbuzz_sentiment_seconds"):
+        scores = get_engine().score_batch([d["text"] for d in docs])
+    telemetry.inc("eventbuzz_sentiment_items_total", len(docs))
+    for doc, sentiment in zip(docs, scores):
+        doc["sentiment"] = sentiment['label']
+        doc["polarity"] = sentiment['polarity']
+        writer.add(doc)
+    return len(docs)
+
+def ingest_writer(label, event_id):
+    """BulkWriter that publishes each flush's per-bucket increments to the event's stream
+    and folds the written items into the event's trends"""
+    def on_flush(new_docs, updated_docs, inserted, updated):
+        buckets = {}
+        for doc in new_docs:
+            b = buckets.setdefault(hour_bucket(doc["created_at"]).isoformat(),
+                                   dict(count=0, **{l: 0 for l in SENTIMENT_LABELS}))
+            b["count"] += 1
+            if doc.get("sentiment") in SENTIMENT_LABELS:
+                b[doc["sentiment"]] += 1
+        publish(event_id, {"type": "metrics", "source": label.lower(),
+                           "inserted": inserted, "updated": updated, "buckets": buckets})
+        # Trending terms and top posts for the hours these items fall in; updated
+        # items carry fresh scores, so they re-rank the top posts too
+        if new_docs or updated_docs:
+            with telemetry.timed("eventbuzz_trends_seconds"):
+                record_trends(new_docs, updated_docs)
+    return BulkWriter(label, on_flush=on_flush)
+
+def resume_from(window_start, watermark):
+    """Where an incremental fetch starts: the watermark minus a small overlap, within the window"""
+    if not watermark or not watermark.get("newest_at"):
+        return window_start
+    overlap = timedelta(minutes=Config.WATERMARK_OVERLAP_MINUTES)
+    return max(window_start, watermark["newest_at"] - overlap)
+
+class NewestSeen:
+    """Tracks the newest item a newest-first walk stored, to move its watermark afterwards.
+
+    The watermark only advances once a walk reaches the resume point. A
+    walk that stops short (item cap, quota, listing limit) saves a paging
+    cursor instead, and the next run continues from it down to the
+    unchanged watermark before newer items are fetched again, so the items
+    in between are never skipped.
+    """
+
+    def __init__(self, watermark=None):
+        watermark = watermark or {}
+        # Where an earlier, unfinished walk stopped, and the newest item it had stored
+        self.cursor = watermark.get("cursor")
+        self.created_at = watermark.get("pending_newest_at")
+
+    def see(self, doc):
+        if self.created_at is None or doc["created_at"] > self.created_at:
+            self.created_at = doc["created_at"]
+
+    def save(self, event_id, source, cursor=None):
+        """Advance the watermark, or record cursor when the walk stopped before the resume point"""
+        if cursor is not None:
+            save_backfill(event_id, source, cursor, self.created_at)
+        elif self.created_at is not None:
+            advance_watermark(event_id, source, self.created_at)
+
+# search() only offers these lookback windows; pick the narrowest that reaches the window start
+REDDIT_TIME_FILTERS = [("day", 1), ("week", 7), ("month", 31), ("year", 366)]
+YOUTUBE_SEARCH_COST = 100
+# Reddit listings end after about this many items however they are paged
+REDDIT_LISTING_CAP = 1000
+
+def reddit_time_filter(after):
+    age = datetime.utcnow() - after
+    for name, days in REDDIT_TIME_FILTERS:
+        if age < timedelta(days=days):
+            return name
+    return "all"
+
+def pace_reddit(reddit):
+    """Sleep until the rate-limit window resets when few requests remain in it"""
+    limits = reddit.auth.limits
+    remaining, reset_at = limits.get("remaining"), limits.get("reset_timestamp")
+    if remaining is not None and reset_at and remaining < Config.REDDIT_MIN_REMAINING:
+        wait = max(reset_at - time.time(), 0)
+        print(f"   ⏳ Reddit rate limit nearly spent ({remaining:.0f} left), waiting {wait:.0f}s")
+        time.sleep(wait)
+
+def youtube_quota_error(error):
+    try:
+        reasons = {e.get("reason") for e in json.loads(error.content)["error"]["errors"]}
+    except (ValueError, KeyError, TypeError):
+        return None
+    return next(iter(reasons & {"quotaExceeded", "rateLimitExceeded", "dailyLimitExceeded"}), None)
+
+def reddit_fetch(event_id, query, after, before, limit=None, watermark=None):
     if not Config.REDDIT_CLIENT_ID or not Config.REDDIT_CLIENT_SECRET:
         print("⚠️  Reddit credentials not set, skipping Reddit fetch")
-        return 0
+        return dict(EMPTY_FETCH)
     
     count = 0
-    try:
-        reddit = praw.Reddit(
-            client_id=Config.REDDIT_CLIENT_ID,
-            client_secret=Config.REDDIT_CLIENT_SECRET,
-            user_agent=Config.REDDIT_USER_AGENT
-        )
+    after = resume_from(after, watermark)
+    newest = NewestSeen(watermark)
+    limit = limit or Config.REDDIT_MAX_ITEMS or None
+    walked, last, reached = 0, None, False
+    with clients.reddit() as reddit, ingest_writer("Reddit", event_id) as writer:
         subreddit = reddit.subreddit("all")
-        
-        for submission in subreddit.search(query, sort="new", time_filter="year", limit=limit):
+        pending = []
+        # The listing is fetched lazily, 100 per request, and walked newest first,
+        # continuing after the submission an earlier walk stopped at
+        params = {"after": newest.cursor} if newest.cursor else None
+        listing = subreddit.search(query, sort="new", time_filter=reddit_time_filter(after),
+                                   limit=limit, params=params)
+        for submission in listing:
+            walked, last = walked + 1, submission.fullname
             created = datetime.utcfromtimestamp(submission.created_utc)
-            if created < after or created > before:
+            if created > before:
                 continue
-            text = (submission.title or "") + " " + (submission.selftext or "")
-            sentiment = analyze_sentiment(text)
-            save_tweet({
+            if created < after:
+                reached = True
+                break  # listing is newest first; everything further is older
+            pending.append({
                 "event_id": event_id,
                 "platform": "reddit",
-                "text": text,
+                "external_id": submission.id,
+                "text": (submission.title or "") + " " + (submission.selftext or ""),
                 "created_at": created,
-                "sentiment": sentiment['label'],
-                "polarity": sentiment['polarity'],
                 "metrics": {"score": submission.score, "num_comments": submission.num_comments},
                 "source": "reddit_submission"
             })
-            count += 1
-        
-        print(f"   → Reddit: {count} posts collected")
-        return count
-        
-    except Exception as e:
-        print(f"❌ Reddit fetch error: {e}")
-        return 0
+            newest.see(pending[-1])
+            if len(pending) >= Config.SENTIMENT_BATCH_SIZE:
+                count += ingest_scored(writer, pending)
+                pending = []
+                pace_reddit(reddit)
+        if pending:
+            count += ingest_scored(writer, pending)
+    # A listing that ran out early has nothing older; one cut off at the item cap continues next run
+    truncated = not reached and walked >= (limit or REDDIT_LISTING_CAP)
+    if truncated:
+        print(f"   ⚠️  Reddit walk stopped after {walked} items, before the resume point; continuing next run")
+    newest.save(event_id, "reddit", cursor=last if truncated else None)
+    
+    print(f"   → Reddit: {count} posts collected in {len(writer.flush_counts)} writes "
+          f"({writer.inserted} new, {writer.updated} updated)")
+    return {"count": count, **writer.summary()}
 
-def youtube_fetch(event_id, query, published_after, published_before, max_results=50):
+def youtube_fetch(event_id, query, published_after, published_before, max_results=None,
+                  watermark=None, quota_budget=None):
     if not Config.YOUTUBE_API_KEY:
         print("⚠️  YouTube API key not set, skipping YouTube fetch")
-        return 0
+        return dict(EMPTY_FETCH)
+    from googleapiclient.errors import HttpError
     
     count = 0
-    try:
-        youtube = build("youtube", "v3", developerKey=Config.YOUTUBE_API_KEY)
-        # search videos
-        search_response = youtube.search().list(
-            q=query,
-            part="id,snippet",
-            type="video",
-            publishedAfter=published_after.isoformat("T") + "Z",
-            publishedBefore=published_before.isoformat("T") + "Z",
-            maxResults=max_results
-        ).execute()
-        
-        for item in search_response.get("items", []):
-            video_id = item["id"]["videoId"]
-            title = item["snippet"]["title"]
-            description = item["snippet"]["description"]
-            published_at = datetime.fromisoformat(item["snippet"]["publishedAt"].rstrip("Z"))
-            full_text = title + " " + description
-            sentiment = analyze_sentiment(full_text)
-            save_tweet({
-                "event_id": event_id,
-                "platform": "youtube",
-                "text": full_text,
-                "created_at": published_at,
-                "sentiment": sentiment['label'],
-                "polarity": sentiment['polarity'],
-                "metrics": {"video_id": video_id},
-                "source": "youtube_video"
-            })
-            count += 1
-        
-        print(f"   → YouTube: {count} videos collected")
-        return count
-        
-    except Exception as e:
-        print(f"❌ YouTube fetch error: {e}")
-        return 0
+    published_after = resume_from(published_after, watermark)
+    newest = NewestSeen(watermark)
+    max_results = min(max_results or Config.YOUTUBE_PAGE_SIZE, 50)
+    max_pages = max((quota_budget or Config.YOUTUBE_QUOTA_BUDGET) // YOUTUBE_SEARCH_COST, 1)
+    pages = 0
+    # Continue from the page an earlier walk stopped at; the search parameters are
+    # unchanged since the watermark only moves once that walk completes
+    page_token = newest.cursor
+    with clients.youtube() as youtube, ingest_writer("YouTube", event_id) as writer:
+        # Each search page is ingested before the next is requested
+        while pages < max_pages:
+            try:
+                search_response = youtube.search().list(
+                    q=query,
+                    part="id,snippet",
+                    type="video",
+                    order="date",
+                    publishedAfter=published_after.isoformat("T") + "Z",
+                    publishedBefore=published_before.isoformat("T") + "Z",
+                    maxResults=max_results,
+                    pageToken=page_token
+                ).execute()
+            except HttpError as e:
+                reason = youtube_quota_error(e)
+                if reason is None and pages == 0 and page_token:
+                    print("   ⚠️  YouTube rejected the saved page token, starting from the newest videos")
+                    page_token = None
+                    continue
+                if reason is None or pages == 0:
+                    raise
+                print(f"   ⚠️  YouTube {reason} after {pages} pages, keeping what was fetched")
+                break
+            pages += 1
+            pending = []
+            for item in search_response.get("items", []):
+                video_id = item["id"]["videoId"]
+                title = item["snippet"]["title"]
+                description = item["snippet"]["description"]
+                published_at = datetime.fromisoformat(item["snippet"]["publishedAt"].rstrip("Z"))
+                pending.append({
+                    "event_id": event_id,
+                    "platform": "youtube",
+                    "external_id": video_id,
+                    "text": title + " " + description,
+                    "created_at": published_at,
+                    "metrics": {"video_id": video_id},
+                    "source": "youtube_video"
+                })
+                newest.see(pending[-1])
+            if pending:
+                count += ingest_scored(writer, pending)
+            page_token = search_response.get("nextPageToken")
+            if not page_token:
+                break
+    # A page token left over means the budget or quota ran out before the resume point
+    if page_token:
+        print(f"   ⚠️  YouTube walk stopped after {pages} pages, before the resume point; continuing next run")
+    newest.save(event_id, "youtube", cursor=page_token)
+    
+    print(f"   → YouTube: {count} videos from {pages} pages collected in {len(writer.flush_counts)} writes "
+          f"({writer.inserted} new, {writer.updated} updated)")
+    return {"count": count, **writer.summary()}
 
-def news_fetch(event_id, query, start_date, end_date):
+def news_fetch(event_id, query, start_date, end_date, watermark=None):
     # Use GDELT summary endpoint (free) to get counts and approximate sentiment/tone
     # Example: https://api.gdeltproject.org/api/v2/summary/summary?d=web&t=compare&q1=query&d1=start_date&d2=end_date
+    # The newest day's volume may still grow, so resume from that day itself
+    if watermark and watermark.get("newest_at"):
+        start_date = max(start_date, watermark["newest_at"].date())
+    newest = NewestSeen()
     params = {
         "d": "web",
         "t": "timelinevol",
@@ -119,11 +343,11 @@ def news_fetch(event_id, query, start_date, end_date):
     url = Config.GDELT_BASE_URL + "summary/summary"
     
     count = 0
-    try:
-        resp = requests.get(url, params=params, timeout=30)
-        resp.raise_for_status()
-        data = resp.json()
-        # The GDELT timeline volumes (counts per day) are returned; we'll convert each day to a document
+    resp = clients.session().get(url, params=params, timeout=Config.SOURCE_TIMEOUTS["news"])
+    resp.raise_for_status()
+    data = resp.json()
+    # The GDELT timeline volumes (counts per day) are returned; we'll convert each day to a document
+    with ingest_writer("News", event_id) as writer:
         for rec in data.get("timeline", []):
             # rec example: {"date":"20251022","value": 234}
             date_str = rec["date"]
@@ -133,85 +357,216 @@ def news_fetch(event_id, query, start_date, end_date):
             sentiment_label = "neutral"
             polarity = 0.0
             # Save as synthetic “news count”
-            save_tweet({
+            doc = {
                 "event_id": event_id,
                 "platform": "news",
+                "external_id": date_str,
                 "text": f"News volume for {query} on {date_str}",
                 "created_at": created,
                 "sentiment": sentiment_label,
                 "polarity": polarity,
                 "metrics": {"news_count": count_val},
                 "source": "gdelt_summary"
-            })
+            }
+            writer.add(doc)
+            newest.see(doc)
             count += 1
-        
-        print(f"   → News: {count} data points collected")
-        return count
+    newest.save(event_id, "news")
+    
+    print(f"   → News: {count} data points collected in {len(writer.flush_counts)} writes "
+          f"({writer.inserted} new, {writer.updated} updated)")
+    return {"count": count, **writer.summary()}
+
+def build_query(ev):
+    hashtags = ev.get("hashtags", [])
+    query_terms = hashtags.copy()
+    if ev.get("keywords"):
+        query_terms.extend([ev.get("keywords")])
+    return " OR ".join(query_terms) if query_terms else ev.get("name", "")
+
+def _timed_fetch(name, fetch, args, kwargs, progress):
+    progress(name, {"state": "running"})
+    started = time.monotonic()
+    try:
+        stats = fetch(*args, **kwargs)
     except Exception as e:
-        print(f"❌ News fetch error: {e}")
-        return 0
+        telemetry.inc("eventbuzz_fetch_total", source=name, outcome="failed")
+        progress(name, {"state": "failed", "error": str(e)})
+        raise
+    duration = time.monotonic() - started
+    telemetry.observe("eventbuzz_fetch_seconds", duration, source=name)
+    telemetry.inc("eventbuzz_fetch_total", source=name, outcome="done")
+    progress(name, {"state": "done", **stats, "duration": round(duration, 3)})
+    return stats, duration
+
+def run_collection(event_id, progress=None, full=False):
+    """Fetch every source concurrently and return a per-source result.
+
+    Each source gets its own timeout (Config.SOURCE_TIMEOUTS) and its
+    failure doesn't affect the others, so the run takes about as long as
+    the slowest source. progress(source, info) is called from the fetch
+    threads as each source starts and finishes. Sources resume from their
+    watermark unless full is set.
+    """
+    report = progress or (lambda source, info: None)
+
+    def progress(source, info):
+        report(source, info)
+        publish(event_id, {"type": "progress", "source": source, **info})
+
+    ev = get_event(event_id)
+    if not ev:
+        print(f"❌ Event not found: {event_id}")
+        return None
+
+    from dateutil import parser
+    start = parser.isoparse(ev.get("start_time"))
+    end = parser.isoparse(ev.get("end_time"))
+    pre_start = start - timedelta(hours=24)
+    post_end = end + timedelta(hours=24)
+    query = build_query(ev)
+
+    print(f"🚀 Starting collection for event: {ev.get('name')}")
+    print(f"   Event ID: {event_id}")
+    print(f"   Query: '{query}'")
+    print(f"   Time range: {pre_start} to {post_end}")
+
+    watermarks = {} if full else get_watermarks(event_id)
+    sources = {
+        "reddit": (reddit_fetch, (event_id, query, pre_start, post_end),
+                   {"watermark": watermarks.get("reddit")}),
+        "youtube": (youtube_fetch, (event_id, query, pre_start, post_end),
+                    {"watermark": watermarks.get("youtube")}),
+        "news": (news_fetch, (event_id, query, pre_start.date(), post_end.date()),
+                 {"watermark": watermarks.get("news")}),
+    }
+
+    publish(event_id, {"type": "collection", "state": "started", "sources": list(sources)})
+    started = time.monotonic()
+    pool = ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix=f"collect-{event_id}")
+    futures = {name: pool.submit(_timed_fetch, name, *spec, progress) for name, spec in sources.items()}
 
-def start_collection_thread(event_id):
-    def runner():
+    results = {}
+    for name, future in futures.items():
+        timeout = Config.SOURCE_TIMEOUTS.get(name, 60)
+        remaining = max(started + timeout - time.monotonic(), 0)
         try:
-            ev = get_event(event_id)
-            if not ev:
-                print(f"❌ Event not found: {event_id}")
+            stats, duration = future.result(timeout=remaining)
+            results[name] = {**stats, "duration": round(duration, 3), "error": None}
+            print(f"✓ {name} fetch completed: {stats['count']} items "
+                  f"({stats['inserted']} new, {stats['updated']} updated) in {duration:.1f}s")
+        except FutureTimeout:
+            results[name] = {**EMPTY_FETCH, "duration": timeout, "error": f"timed out after {timeout}s"}
+            telemetry.inc("eventbuzz_fetch_total", source=name, outcome="timeout")
+            progress(name, {"state": "timeout", "error": results[name]["error"]})
+            print(f"✗ {name} fetch timed out after {timeout}s")
+        except Exception as e:
+            results[name] = {**EMPTY_FETCH, "duration": round(time.monotonic() - started, 3), "error": str(e)}
+            print(f"✗ {name} fetch failed: {e}")
+    # A timed-out fetcher can't be interrupted; let it finish in the background
+    pool.shutdown(wait=False)
+
+    duration = time.monotonic() - started
+    print(f"   🧠 Sentiment engine: {get_engine().stats()}")
+    print(f"✅ Collection complete for event: {ev.get('name')} (ID: {event_id}) in {duration:.1f}s")
+    result = {"event_id": event_id, "duration": round(duration, 3), "sources": results}
+    publish(event_id, {"type": "collection", "state": "done", **result})
+    return result
+
+### Out-of-process worker
+def process_job(job, worker_id):
+    """Run one claimed job, heartbeating its lease until the collection returns"""
+    job_id = job["job_id"]
+    sources = {}
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def progress(source, info):
+        with lock:
+            sources.setdefault(source, {}).update(info)
+
+    def heartbeat():
+        while not stop.wait(Config.JOB_LEASE_SECONDS / 3):
+            with lock:
+                snapshot = {k: dict(v) for k, v in sources.items()}
+            if not heartbeat_job(job_id, worker_id, sources=snapshot):
+                print(f"⚠️  Lost lease on job {job_id}")
                 return
-            
-            from dateutil import parser
-            start = parser.isoparse(ev.get("start_time"))
-            end = parser.isoparse(ev.get("end_time"))
-            pre_start = start - timedelta(hours=24)
-            pre_end = start - timedelta(seconds=1)
-            post_start = end + timedelta(seconds=1)
-            post_end = end + timedelta(hours=24)
-
-            # Build query
-            hashtags = ev.get("hashtags", [])
-            query_terms = hashtags.copy()
-            if ev.get("keywords"):
-                query_terms.extend([ev.get("keywords")])
-            query = " OR ".join(query_terms) if query_terms else ev.get("name", "")
-
-            print(f"🚀 Starting collection for event: {ev.get('name')}")
-            print(f"   Event ID: {event_id}")
-            print(f"   Query: '{query}'")
-            print(f"   Time range: {pre_start} to {post_end}")
-
-            reddit_count = 0
-            youtube_count = 0
-            news_count = 0
-
-            # Reddit
-            try:
-                before_reddit = Config.MONGO_URI and True  # Check if we can count
-                reddit_fetch(event_id, query, pre_start, post_end, limit=200)
-                # Count how many were added (approximate)
-                print(f"✓ Reddit fetch completed")
-            except Exception as e:
-                print(f"✗ Reddit fetch failed: {e}")
 
-            # YouTube
-            try:
-                youtube_fetch(event_id, query, pre_start, post_end, max_results=30)
-                print(f"✓ YouTube fetch completed")
-            except Exception as e:
-                print(f"✗ YouTube fetch failed: {e}")
+    beat = threading.Thread(target=heartbeat, daemon=True)
+    beat.start()
+    error = None
+    try:
+        if run_collection(job["event_id"], progress=progress, full=job.get("full", False)) is None:
+            error = "event not found"
+    except Exception as e:
+        error = str(e)
+        traceback.print_exc()
+    finally:
+        stop.set()
+        beat.join()
+    with lock:
+        status = finish_job(job_id, worker_id, sources=sources, error=error)
+    print(f"{'✅' if status == 'done' else '⚠️ '} Job {job_id} for event {job['event_id']}: {status}")
+    return status
 
-            # News
+def run_worker(concurrency=1, poll_interval=None):
+    """Claim and run jobs from the jobs collection until interrupted"""
+    poll_interval = poll_interval or Config.WORKER_POLL_SECONDS
+    base_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    def loop(worker_id):
+        while True:
             try:
-                news_fetch(event_id, query, pre_start.date(), post_end.date())
-                print(f"✓ News fetch completed")
+                job = claim_job(worker_id)
             except Exception as e:
-                print(f"✗ News fetch failed: {e}")
+                print(f"❌ Claiming job failed: {e}")
+                job = None
+            if job is None:
+                time.sleep(poll_interval)
+                continue
+            print(f"📥 {worker_id} claimed job {job['job_id']} (attempt {job['attempts']})")
+            process_job(job, worker_id)
 
-            print(f"✅ Collection complete for event: {ev.get('name')} (ID: {event_id})")
-            
-        except Exception as e:
-            print(f"❌ Collection thread failed: {e}")
-            traceback.print_exc()
+    print(f"👷 Collection worker {base_id} started with {concurrency} slot(s)")
+    threads = [
+        threading.Thread(target=loop, args=(f"{base_id}:{n}",), daemon=True)
+        for n in range(concurrency)
+    ]
+    for t in threads:
+        t.start()
+    try:
+        for t in threads:
+            t.join()
+    except KeyboardInterrupt:
+        print("👋 Worker stopping; unfinished jobs are retried once their lease expires")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Event Buzz Analyzer collector")
+    sub = parser.add_subparsers(dest="command", required=True)
+    worker = sub.add_parser("worker", help="Run collection jobs from the MongoDB jobs queue")
+    worker.add_argument("--concurrency", type=int, default=1, help="Jobs to run at once")
+    worker.add_argument("--poll-interval", type=float, help="Seconds to wait when the queue is empty")
+    worker.add_argument("--refresh", action="store_true", help="Also run the active-event refresh scheduler")
+    collect = sub.add_parser("collect", help="Collect one event now, in this process")
+    collect.add_argument("--event-id", required=True)
+    collect.add_argument("--full", action="store_true",
+                         help="Ignore the watermarks and re-collect the whole event window")
+    refresh = sub.add_parser("refresh", help="Periodically re-collect events whose window includes now")
+    refresh.add_argument("--interval", type=float, help="Seconds between collections of one event")
+    refresh.add_argument("--jitter", type=float, help="Random spread (+/- seconds) around the interval")
+    args = parser.parse_args()
 
-    t = threading.Thread(target=runner, daemon=True)
-    t.start()
-    return t
+    if args.command == "worker":
+        if args.refresh:
+            from scheduler import run_refresh_scheduler
+            threading.Thread(target=run_refresh_scheduler, daemon=True).start()
+        run_worker(concurrency=args.concurrency, poll_interval=args.poll_interval)
+    elif args.command == "collect":
+        if run_collection(args.event_id, full=args.full) is None:
+            raise SystemExit(1)
+    elif args.command == "refresh":
+        from scheduler import run_refresh_scheduler
+        run_refresh_scheduler(interval=args.interval, jitter=args.jitter)
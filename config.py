@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -18,4 +19,103 @@ class Config:
     # News / GDELT (no key needed for core endpoints)
     GDELT_BASE_URL = "https://api.gdeltproject.org/api/v2/"
 
+    # Ingestion: buffered bulk writes
+    INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "100"))
+    INGEST_FLUSH_SECONDS = float(os.getenv("INGEST_FLUSH_SECONDS", "5"))
+
+    # Sentiment scoring
+    SENTIMENT_WORKERS = int(os.getenv("SENTIMENT_WORKERS", "2"))
+    SENTIMENT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", "64"))
+    SENTIMENT_CACHE_SIZE = int(os.getenv("SENTIMENT_CACHE_SIZE", "50000"))
+    # Fewer uncached texts than this are scored on the calling thread instead of the pool
+    SENTIMENT_INLINE_MAX = int(os.getenv("SENTIMENT_INLINE_MAX", "8"))
+
+    # Collection scheduler: worker threads, queued-job limit, finished jobs kept for status
+    COLLECTION_WORKERS = int(os.getenv("COLLECTION_WORKERS", "2"))
+    COLLECTION_QUEUE_SIZE = int(os.getenv("COLLECTION_QUEUE_SIZE", "10"))
+    COLLECTION_HISTORY = int(os.getenv("COLLECTION_HISTORY", "200"))
+
+    # "thread" runs collections inside the web process; "mongo" only enqueues
+    # them in the jobs collection for `python -m collector worker` processes
+    COLLECTION_BACKEND = os.getenv("COLLECTION_BACKEND", "thread")
+    JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "120"))
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    WORKER_POLL_SECONDS = float(os.getenv("WORKER_POLL_SECONDS", "5"))
+
+    # Live updates: "mongo" (capped collection tail) reaches every process; "memory" only
+    # reaches subscribers in the publishing process, so it suits a single-process dev server.
+    # SSE_ENABLED=0 turns /stream off (the dashboard then polls); each open stream holds a
+    # worker thread, so serve it with threaded workers (see gunicorn.conf.py). At most
+    # SSE_MAX_STREAMS streams are open per process; further dashboards fall back to polling
+    PUBSUB_BACKEND = os.getenv("PUBSUB_BACKEND", "mongo")
+    SSE_ENABLED = os.getenv("SSE_ENABLED", "1") == "1"
+    STREAM_CAPPED_BYTES = int(os.getenv("STREAM_CAPPED_BYTES", str(16 * 1024 * 1024)))
+    SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+    SSE_MAX_SECONDS = float(os.getenv("SSE_MAX_SECONDS", "300"))
+    SSE_MAX_STREAMS = int(os.getenv("SSE_MAX_STREAMS", "4"))
+    # Clock skew tolerated between processes publishing to the mongo stream
+    STREAM_CLOCK_SKEW_SECONDS = float(os.getenv("STREAM_CLOCK_SKEW_SECONDS", "300"))
+
+    # Incremental collection: re-fetch this far behind each source's newest item
+    WATERMARK_OVERLAP_MINUTES = int(os.getenv("WATERMARK_OVERLAP_MINUTES", "10"))
+    # Refresh scheduler: re-collect active events every interval (+/- jitter) seconds
+    REFRESH_INTERVAL_SECONDS = float(os.getenv("REFRESH_INTERVAL_SECONDS", "900"))
+    REFRESH_JITTER_SECONDS = float(os.getenv("REFRESH_JITTER_SECONDS", "120"))
+
+    # Per-source collection timeouts (seconds)
+    SOURCE_TIMEOUTS = {
+        "reddit": float(os.getenv("REDDIT_TIMEOUT", "600")),
+        "youtube": float(os.getenv("YOUTUBE_TIMEOUT", "300")),
+        "news": float(os.getenv("NEWS_TIMEOUT", "30")),
+    }
+
+    # Shared HTTP session: pooled connections per host, retries on 429/5xx
+    HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+    HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+    HTTP_BACKOFF_SECONDS = float(os.getenv("HTTP_BACKOFF_SECONDS", "0.5"))
+
+    # Paged fetching. Reddit listings stop at the window start (or this many items, 0 = no cap);
+    # YouTube search pages cost 100 quota units each and stop once the budget is spent
+    REDDIT_MAX_ITEMS = int(os.getenv("REDDIT_MAX_ITEMS", "0"))
+    REDDIT_MIN_REMAINING = int(os.getenv("REDDIT_MIN_REMAINING", "5"))
+    YOUTUBE_PAGE_SIZE = int(os.getenv("YOUTUBE_PAGE_SIZE", "50"))
+    YOUTUBE_QUOTA_BUDGET = int(os.getenv("YOUTUBE_QUOTA_BUDGET", "2000"))
+
     EXPORT_FOLDER = os.path.join(os.getcwd(), "exports")
+    # Streaming exports: Mongo cursor batch size, and gzip when the client accepts it
+    EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+    EXPORT_GZIP = os.getenv("EXPORT_GZIP", "1") == "1"
+    # Metrics timeseries: resolution=auto picks the finest granularity within this many points,
+    # and longer series are downsampled to it (callers may ask for fewer with max_points)
+    METRICS_MAX_POINTS = int(os.getenv("METRICS_MAX_POINTS", "500"))
+    # An explicit resolution may build at most this many times max_points buckets before
+    # downsampling; beyond that the next coarser granularity is used
+    METRICS_MAX_DOWNSAMPLE = int(os.getenv("METRICS_MAX_DOWNSAMPLE", "4"))
+    # as_of is held back this far, so a rollup change stamped earlier but committed later
+    # (writers flush concurrently) still falls inside the next since= delta
+    METRICS_AS_OF_MARGIN_SECONDS = float(os.getenv("METRICS_AS_OF_MARGIN_SECONDS", "5"))
+
+    # Block compressor for the items collection ("zstd", "zlib", "snappy"; empty = server default).
+    # Only applies when the collection is created
+    TWEETS_BLOCK_COMPRESSOR = os.getenv("TWEETS_BLOCK_COMPRESSOR", "zstd")
+
+    # Trending terms: Space-Saving sketch capacity per (event, hour) batch, terms kept per hour
+    # in Mongo (headroom above the sketch so near-cutoff terms can accumulate), posts kept per hour
+    TRENDS_SKETCH_SIZE = int(os.getenv("TRENDS_SKETCH_SIZE", "100"))
+    TRENDS_TERMS_KEPT = int(os.getenv("TRENDS_TERMS_KEPT", "200"))
+    TRENDS_TOP_POSTS = int(os.getenv("TRENDS_TOP_POSTS", "10"))
+
+    # Telemetry: each process writes its counters/histograms here; /metrics sums them.
+    # Clear the directory on redeploy. PROFILING_ENABLED lets ?profile=1 dump a cProfile per request
+    METRICS_DIR = os.getenv("METRICS_DIR", os.path.join(tempfile.gettempdir(), "eventbuzz_metrics"))
+    METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+    PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "eventbuzz_profiles"))
+
+    # Response caches shared by all workers on the host (SQLite file), keyed by event data version
+    CACHE_PATH = os.getenv("CACHE_PATH", os.path.join(tempfile.gettempdir(), "eventbuzz_cache.sqlite3"))
+    METRICS_CACHE_SIZE = int(os.getenv("METRICS_CACHE_SIZE", "512"))
+    PDF_CACHE_SIZE = int(os.getenv("PDF_CACHE_SIZE", "32"))
+    # Parquet / Arrow exports: rows per row group, and bytes kept in memory before spilling to disk
+    EXPORT_ROW_GROUP_SIZE = int(os.getenv("EXPORT_ROW_GROUP_SIZE", "50000"))
+    EXPORT_SPOOL_BYTES = int(os.getenv("EXPORT_SPOOL_BYTES", str(16 * 1024 * 1024)))
@@ -0,0 +1,99 @@
+from config import Config
+from models import iter_tweets_for_event, SENTIMENT_LABELS
+
+EXPORT_FIELDS = ["platform", "source", "external_id", "text", "created_at", "sentiment", "polarity", "metrics"]
+METRIC_FIELDS = ["score", "num_comments", "news_count", "video_id"]
+
+# Categorical columns are dictionary-encoded against a fixed vocabulary, so every
+# record batch shares one dictionary (the Arrow IPC file format can't replace it
+# mid-file). Values outside the vocabulary are written as "unknown".
+VOCABULARIES = {
+    "platform": ("reddit", "youtube", "news", "unknown"),
+    "source": ("reddit_submission", "youtube_video", "gdelt_summary", "unknown"),
+    "sentiment": SENTIMENT_LABELS + ("unknown",),
+}
+
+FORMATS = {
+    "parquet": {"extension": "parquet", "mimetype": "application/vnd.apache.parquet"},
+    "arrow": {"extension": "arrow", "mimetype": "application/vnd.apache.arrow.file"},
+}
+
+def export_schema():
+    import pyarrow as pa
+
+    category = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("platform", category),
+        ("source", category),
+        ("external_id", pa.string()),
+        ("text", pa.string()),
+        ("created_at", pa.timestamp("ms")),
+        ("sentiment", category),
+        ("polarity", pa.float32()),
+        ("score", pa.int64()),
+        ("num_comments", pa.int64()),
+        ("news_count", pa.int64()),
+        ("video_id", pa.string()),
+    ])
+
+def _record_batch(rows, schema):
+    import pyarrow as pa
+
+    columns = {name: [] for name in schema.names}
+    for row in rows:
+        metrics = row.get("metrics") or {}
+        for name in schema.names:
+            columns[name].append(metrics.get(name) if name in METRIC_FIELDS else row.get(name))
+    return pa.RecordBatch.from_arrays(
+        [_column(columns[f.name], f) for f in schema], schema=schema
+    )
+
+def _column(values, field):
+    import pyarrow as pa
+
+    vocabulary = VOCABULARIES.get(field.name)
+    if vocabulary is None:
+        return pa.array(values, type=field.type)
+    index = {v: i for i, v in enumerate(vocabulary)}
+    unknown = index["unknown"]
+    indices = pa.array([None if v is None else index.get(v, unknown) for v in values], type=field.type.index_type)
+    return pa.DictionaryArray.from_arrays(indices, pa.array(vocabulary, type=field.type.value_type))
+
+def _iter_batches(event_id, schema, row_group_size):
+    rows = []
+    for row in iter_tweets_for_event(event_id, EXPORT_FIELDS):
+        rows.append(row)
+        if len(rows) >= row_group_size:
+            yield _record_batch(rows, schema)
+            rows = []
+    if rows:
+        yield _record_batch(rows, schema)
+
+def write_columnar(event_id, fmt, sink, row_group_size=None):
+    """Write an event's items to sink as Parquet or Arrow IPC; returns the row count.
+
+    Rows are read from a cursor and converted one row group at a time, so
+    memory holds at most row_group_size rows regardless of event size.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = export_schema()
+    row_group_size = row_group_size or Config.EXPORT_ROW_GROUP_SIZE
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+        write = lambda batch: writer.write_table(pa.Table.from_batches([batch]))
+    elif fmt == "arrow":
+        writer = pa.ipc.new_file(sink, schema)
+        write = writer.write_batch
+    else:
+        raise ValueError(f"unsupported export format: {fmt}")
+
+    rows = 0
+    try:
+        for batch in _iter_batches(event_id, schema, row_group_size):
+            write(batch)
+            rows += batch.num_rows
+    finally:
+        writer.close()
+    return rows
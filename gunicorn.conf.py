@@ -0,0 +1,14 @@
+# gunicorn reads ./gunicorn.conf.py by default: `gunicorn app:app`
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", "2"))
+# Threaded workers: each open /stream holds one thread, not a whole worker, for up to
+# SSE_MAX_SECONDS. At most SSE_MAX_STREAMS threads per worker serve streams (further
+# dashboards poll), so keep threads well above it for page loads, /api/metrics and exports
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "16"))
+# Streams send a keepalive every SSE_HEARTBEAT_SECONDS; stay well above it
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+# The Mongo client and caches are created per process after fork (models._get_connection)
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
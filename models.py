@@ -1,29 +1,185 @@
-from pymongo import MongoClient
+import atexit
+import os
+import threading
+import time
+import weakref
+from collections import Counter
+from pymongo import MongoClient, ASCENDING, DESCENDING, CursorType, InsertOne, UpdateOne, ReturnDocument
+from pymongo.errors import BulkWriteError, CollectionInvalid, DuplicateKeyError, OperationFailure
 from config import Config
+import telemetry
 from datetime import datetime, timedelta
 from bson.objectid import ObjectId
 
 # Lazy connection - don't connect on import
 _client = None
 _db = None
+_client_pid = None
+_indexes_ensured = False
+_connection_lock = threading.Lock()
 
 def _get_connection():
-    """Lazy connection to MongoDB"""
-    global _client, _db
-    if _client is None:
-        _client = MongoClient(Config.MONGO_URI, serverSelectionTimeoutMS=5000, connectTimeoutMS=5000)
-        _db = _client.get_default_database()
+    """Lazy connection to MongoDB, one client per process.
+
+    MongoClient isn't fork-safe, so a process forked after connecting
+    (gunicorn --preload) builds its own client on first use.
+    """
+    global _client, _db, _client_pid, _indexes_ensured
+    if _client is None or _client_pid != os.getpid():
+        with _connection_lock:
+            if _client is None or _client_pid != os.getpid():
+                client = MongoClient(Config.MONGO_URI, serverSelectionTimeoutMS=5000, connectTimeoutMS=5000)
+                db = client.get_default_database()
+                if not _indexes_ensured:
+                    ensure_indexes(db)
+                    _indexes_ensured = True
+                _client, _db, _client_pid = client, db, os.getpid()
     return _db
 
+def _forget_connection():
+    # The parent's sockets must not be used from the child; drop the reference without closing them
+    global _client, _db, _client_pid, _connection_lock
+    _client, _db, _client_pid = None, None, None
+    _connection_lock = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_connection)
+
+def ensure_indexes(db):
+    """Create whichever of the indexes the write and read paths rely on are missing.
+
+    Runs on each process's first connection, so it never drops, rebuilds
+    or migrates anything: an index that exists under its name is left
+    as is, even if outdated. Those changes are made by migrate(), run
+    once per deploy via `python models.py ensure-indexes`.
+
+    Every query shape in this module should be served by one of these;
+    `python models.py check-plans` fails if any of them falls back to a
+    collection scan.
+    """
+    existing = {}
+
+    def create(coll, keys, name, **options):
+        if coll not in existing:
+            existing[coll] = set(db[coll].index_information())
+        if name not in existing[coll]:
+            db[coll].create_index(keys, name=name, **options)
+
+    # list_events: newest first
+    create("events", [("created_at", DESCENDING)], "events_by_created")
+    # find_event_by_name / search_or_create_event: one event per normalized name.
+    # Partial so events created before name_key existed don't collide on null
+    create("events", [("name_key", ASCENDING)], "event_name_key",
+           unique=True, partialFilterExpression={"name_key": {"$exists": True}})
+    _ensure_tweets_collection(db)
+    # get_tweets_for_event / iter_tweets_for_event / rebuild_rollups: an event's items in time order.
+    # Carries every analytic field, so those reads never touch the (text-heavy) documents
+    create("tweets", [(f, ASCENDING) for f in ANALYTIC_INDEX_FIELDS], "event_analytics")
+    # count_tweets_filter with a sentiment
+    create("tweets", [("event_id", ASCENDING), ("sentiment", ASCENDING), ("created_at", ASCENDING)],
+           "event_sentiment_time")
+    # Rollup upserts and $merge need a unique key per bucket at each granularity
+    if _rollup_key_outdated(db):
+        print("⚠️  rollups.rollup_key predates granularities; run `python models.py ensure-indexes`")
+    create("rollups",
+           [("event_id", ASCENDING), ("granularity", ASCENDING), ("bucket", ASCENDING), ("platform", ASCENDING)],
+           "rollup_key", unique=True)
+    # Natural key per source item, so re-collections upsert instead of duplicating
+    create("tweets", [("event_id", ASCENDING), ("platform", ASCENDING), ("external_id", ASCENDING)], "natural_key",
+           unique=True, partialFilterExpression={"external_id": {"$exists": True}})
+    # One trends document per (event, hour); get_trends reads a window of them in order
+    create("trends", [("event_id", ASCENDING), ("bucket", ASCENDING)], "trend_key", unique=True)
+    # One watermark per (event, source)
+    create("watermarks", [("event_id", ASCENDING), ("source", ASCENDING)], "watermark_key", unique=True)
+    # At most one queued/running collection job per event
+    create("jobs", [("event_id", ASCENDING)], "one_active_job_per_event",
+           unique=True, partialFilterExpression={"active": True})
+    create("jobs", [("status", ASCENDING), ("queued_at", ASCENDING)], "claim_order")
+    # get_latest_job
+    create("jobs", [("event_id", ASCENDING), ("queued_at", DESCENDING)], "jobs_by_event")
+
+def migrate(db):
+    """One-off schema changes, then any missing indexes.
+
+    Run once per deploy, before starting the new web and worker
+    processes (`python models.py ensure-indexes`): the rollup re-key
+    leaves a gap between dropping the old unique index and building the
+    new one in which concurrent upserts could duplicate buckets.
+    """
+    # Rollups from before granularities existed are hourly; re-key them as such
+    if _rollup_key_outdated(db):
+        db.rollups.update_many({"granularity": {"$exists": False}}, {"$set": {"granularity": "hour"}})
+        _drop_index(db.rollups, "rollup_key")
+    # A prefix of event_analytics
+    _drop_index(db.tweets, "event_time")
+    ensure_indexes(db)
+
+def _rollup_key_outdated(db):
+    old = db.rollups.index_information().get("rollup_key")
+    return bool(old) and "granularity" not in dict(old["key"])
+
+def _drop_index(coll, name):
+    try:
+        coll.drop_index(name)
+    except OperationFailure:
+        pass  # already gone, or dropped concurrently
+
+def _ensure_tweets_collection(db):
+    """Create the items collection with Config.TWEETS_BLOCK_COMPRESSOR, if it doesn't exist yet.
+
+    Compression is fixed at creation; an existing collection keeps the
+    compressor it was created with until it is dumped and restored.
+    """
+    if not Config.TWEETS_BLOCK_COMPRESSOR or db.list_collection_names(filter={"name": "tweets"}):
+        return
+    try:
+        db.create_collection("tweets", storageEngine={
+            "wiredTiger": {"configString": f"block_compressor={Config.TWEETS_BLOCK_COMPRESSOR}"},
+        })
+    except CollectionInvalid:
+        pass  # created concurrently
+
 def _get_events_coll():
     return _get_connection().events
 
 def _get_tweets_coll():
     return _get_connection().tweets
 
+def _get_rollups_coll():
+    return _get_connection().rollups
+
+def _get_jobs_coll():
+    return _get_connection().jobs
+
+def _get_trends_coll():
+    return _get_connection().trends
+
+def _get_watermarks_coll():
+    return _get_connection().watermarks
+
+def _get_stream_coll():
+    """Capped collection used as a cross-process message stream"""
+    db = _get_connection()
+    if "stream" not in db.list_collection_names(filter={"name": "stream"}):
+        try:
+            db.create_collection("stream", capped=True, size=Config.STREAM_CAPPED_BYTES)
+        except CollectionInvalid:
+            pass  # created concurrently
+    return db.stream
+
+SENTIMENT_LABELS = ("positive", "negative", "neutral")
+# What the analytics path reads from an item; everything else (text, metrics) is only for exports
+ANALYTIC_FIELDS = ("platform", "created_at", "sentiment", "polarity")
+ANALYTIC_INDEX_FIELDS = ("event_id", "created_at", "platform", "sentiment", "polarity")
+
+def normalize_event_name(name):
+    """Case- and whitespace-insensitive lookup key for an event name"""
+    return " ".join(name.split()).casefold()
+
 def create_event(event_data):
     event_data = event_data.copy()
     event_data['created_at'] = datetime.utcnow()
+    event_data['name_key'] = normalize_event_name(event_data.get('name', ''))
     result = _get_events_coll().insert_one(event_data)
     return str(result.inserted_id)
 
@@ -39,17 +195,13 @@ def get_event(event_id):
 
 def find_event_by_name(event_name):
     """Find event by name (case-insensitive)"""
-    doc = _get_events_coll().find_one({"name": {"$regex": f"^{event_name}$", "$options": "i"}})
+    doc = _get_events_coll().find_one({"name_key": normalize_event_name(event_name)})
     if doc:
         doc['_id'] = str(doc['_id'])
     return doc
 
 def search_or_create_event(event_name):
-    """Search for event by name, or create if not exists"""
-    existing = find_event_by_name(event_name)
-    if existing:
-        return existing['_id']
-    
+    """Search for event by name, or create if not exists (one atomic upsert)"""
     # Create new event with auto-generated date range
     now = datetime.utcnow()
     start_time = now - timedelta(days=7)
@@ -63,11 +215,60 @@ def search_or_create_event(event_name):
         "start_time": start_time.isoformat(),
         "end_time": end_time.isoformat(),
         "auto_created": True,
-        "created_at": datetime.utcnow()
+        "created_at": now
     }
     
-    result = _get_events_coll().insert_one(event_data)
-    return str(result.inserted_id)
+    name_key = normalize_event_name(event_name)
+    try:
+        doc = _get_events_coll().find_one_and_update(
+            {"name_key": name_key}, {"$setOnInsert": event_data},
+            upsert=True, projection={"_id": 1}, return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # A concurrent request upserted the same name first
+        doc = _get_events_coll().find_one({"name_key": name_key}, {"_id": 1})
+    return str(doc["_id"])
+
+def backfill_name_keys():
+    """Set name_key on events created before it existed; returns (updated, duplicates)"""
+    updated, duplicates = 0, []
+    for doc in _get_events_coll().find({"name_key": {"$exists": False}}, {"name": 1}).sort("created_at", 1):
+        try:
+            _get_events_coll().update_one(
+                {"_id": doc["_id"]}, {"$set": {"name_key": normalize_event_name(doc.get("name", ""))}}
+            )
+            updated += 1
+        except DuplicateKeyError:
+            # An older event already owns this name; leave this one unkeyed
+            duplicates.append(str(doc["_id"]))
+    return updated, duplicates
+
+def bump_data_version(event_ids):
+    """Mark events' derived data (metrics, reports) stale after their items changed"""
+    ids = []
+    for event_id in event_ids:
+        try:
+            ids.append(ObjectId(event_id))
+        except Exception:
+            continue
+    if ids:
+        _get_events_coll().update_many({"_id": {"$in": ids}}, {"$inc": {"data_version": 1}})
+
+def get_event_data_version(event_id):
+    """Counter bumped by ingestion whenever the event's items change"""
+    try:
+        doc = _get_events_coll().find_one({"_id": ObjectId(event_id)}, {"data_version": 1})
+    except Exception:
+        return None
+    return doc.get("data_version", 0) if doc else None
+
+def list_event_windows():
+    """_id, name and collection window of every event"""
+    out = []
+    for d in _get_events_coll().find({}, {"name": 1, "start_time": 1, "end_time": 1}):
+        d['_id'] = str(d['_id'])
+        out.append(d)
+    return out
 
 def list_events():
     out = []
@@ -78,17 +279,324 @@ def list_events():
 
 def save_tweet(tweet_doc):
     tweet_doc['cached_at'] = datetime.utcnow()
-    return _get_tweets_coll().insert_one(tweet_doc)
+    details = _write_items([tweet_doc])
+    if details["nInserted"] or details["upserted"]:
+        update_rollups([tweet_doc])
+    if details["nInserted"] or details["upserted"] or details["nModified"]:
+        bump_data_version([tweet_doc.get("event_id")])
+    return details
 
-def get_tweets_for_event(event_id, start=None, end=None):
-    q = {"event_id": event_id}
-    if start or end:
-        q['created_at'] = {}
-        if start: q['created_at']['$gte'] = start
-        if end: q['created_at']['$lte'] = end
-    return list(_get_tweets_coll().find(q).sort("created_at", 1))
+def _natural_key(tweet_doc):
+    return {k: tweet_doc[k] for k in ("event_id", "platform", "external_id")}
 
-def count_tweets_filter(event_id, start=None, end=None, sentiment=None):
+# What update_rollups counts an item by; only written on insert, so a re-collected
+# item never disagrees with the rollups it was counted in
+INSERT_ONLY_FIELDS = ("created_at", "sentiment", "polarity", "cached_at")
+
+def _item_op(tweet_doc):
+    """Upsert on the natural key when the item has one, plain insert otherwise.
+
+    An update refreshes text, metrics and the like; the fields in
+    INSERT_ONLY_FIELDS keep the values the item was first stored with.
+    """
+    if tweet_doc.get("external_id") is None:
+        return InsertOne(tweet_doc)
+    return UpdateOne(
+        _natural_key(tweet_doc),
+        {
+            "$set": {k: v for k, v in tweet_doc.items() if k not in INSERT_ONLY_FIELDS},
+            "$setOnInsert": {k: tweet_doc[k] for k in INSERT_ONLY_FIELDS if k in tweet_doc},
+        },
+        upsert=True,
+    )
+
+def _write_items(tweet_docs):
+    """One unordered bulk_write; returns the server's result details"""
+    try:
+        return _get_tweets_coll().bulk_write([_item_op(d) for d in tweet_docs], ordered=False).bulk_api_result
+    except BulkWriteError as e:
+        return e.details
+
+# Writers that still hold buffered items; flushed at interpreter shutdown
+_open_writers = weakref.WeakSet()
+
+class BulkWriter:
+    """Buffers item dicts and writes them with one unordered bulk_write.
+
+    Items carrying an external_id are upserted on their natural key
+    (event_id, platform, external_id), so collecting the same item twice
+    updates it instead of inserting a duplicate. A flush happens when batch_size items are buffered, when an add() arrives
+    flush_interval seconds after the previous flush, on close(), and at exit.
+    on_flush(new_docs, updated_docs, inserted, updated) is called after each
+    non-empty flush; updated_docs are the batch's items that matched one
+    already stored.
+    """
+
+    def __init__(self, label="ingest", batch_size=None, flush_interval=None, on_flush=None):
+        self.label = label
+        self.on_flush = on_flush
+        self.batch_size = batch_size or Config.INGEST_BATCH_SIZE
+        self.flush_interval = flush_interval or Config.INGEST_FLUSH_SECONDS
+        self.flush_counts = []
+        self.inserted = 0
+        self.updated = 0
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        _open_writers.add(self)
+
+    def add(self, tweet_doc):
+        tweet_doc['cached_at'] = datetime.utcnow()
+        with self._lock:
+            self._buffer.append(tweet_doc)
+            due = (len(self._buffer) >= self.batch_size
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+        if not batch:
+            return 0
+
+        with telemetry.timed("eventbuzz_db_write_seconds", op="items"):
+            details = _write_items(batch)
+        failed = {err["index"] for err in details.get("writeErrors", [])}
+        if failed:
+            print(f"⚠️  {self.label}: {len(failed)} items failed to write")
+        # Only new items count towards rollups; updates re-set the same item
+        new_indexes = {u["index"] for u in details.get("upserted", [])}
+        new_indexes.update(
+            i for i, d in enumerate(batch) if d.get("external_id") is None and i not in failed
+        )
+        new_docs = [batch[i] for i in sorted(new_indexes)]
+        updated_docs = [d for i, d in enumerate(batch) if i not in new_indexes and i not in failed]
+        with telemetry.timed("eventbuzz_db_write_seconds", op="rollups"):
+            update_rollups(new_docs)
+
+        inserted = len(new_indexes)
+        updated = details.get("nModified", 0)
+        if inserted or updated:
+            bump_data_version({d.get("event_id") for d in batch})
+        self.flush_counts.append(inserted)
+        self.inserted += inserted
+        self.updated += updated
+        for platform, n in Counter(d.get("platform") or "unknown" for d in new_docs).items():
+            telemetry.inc("eventbuzz_items_ingested_total", n, platform=platform)
+        if updated:
+            telemetry.inc("eventbuzz_items_updated_total", updated, writer=self.label)
+        print(f"   💾 {self.label}: flushed {len(batch)} items ({inserted} new, {updated} updated)")
+        if self.on_flush and (inserted or updated):
+            try:
+                self.on_flush(new_docs, updated_docs, inserted, updated)
+            except Exception as e:
+                print(f"⚠️  {self.label}: flush callback failed: {e}")
+        return inserted
+
+    def summary(self):
+        return {"inserted": self.inserted, "updated": self.updated}
+
+    def close(self):
+        self.flush()
+        _open_writers.discard(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+@atexit.register
+def _flush_open_writers():
+    for writer in list(_open_writers):
+        try:
+            writer.close()
+        except Exception as e:
+            print(f"❌ Flush on shutdown failed for {writer.label}: {e}")
+
+# Rollups are kept at each of these, so coarse views never scan fine buckets
+GRANULARITIES = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+def bucket_start(dt, granularity):
+    if granularity == "minute":
+        return dt.replace(second=0, microsecond=0)
+    if granularity == "day":
+        return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+def hour_bucket(dt):
+    return bucket_start(dt, "hour")
+
+def update_rollups(tweet_docs):
+    """$inc the (event_id, granularity, bucket, platform) rollups for newly written items"""
+    grouped = {}
+    for doc in tweet_docs:
+        created = doc.get("created_at")
+        if not created:
+            continue
+        for granularity in GRANULARITIES:
+            key = (doc.get("event_id"), granularity, bucket_start(created, granularity), doc.get("platform") or "unknown")
+            inc = grouped.setdefault(key, dict(count=0, polarity_sum=0.0, **{l: 0 for l in SENTIMENT_LABELS}))
+            inc["count"] += 1
+            inc["polarity_sum"] += doc.get("polarity") or 0
+            if doc.get("sentiment") in SENTIMENT_LABELS:
+                inc[doc["sentiment"]] += 1
+
+    ops = [
+        UpdateOne(
+            {"event_id": event_id, "granularity": granularity, "bucket": bucket, "platform": platform},
+            {"$inc": inc, "$currentDate": {"updated_at": True}},
+            upsert=True,
+        )
+        for (event_id, granularity, bucket, platform), inc in grouped.items()
+    ]
+    if ops:
+        _get_rollups_coll().bulk_write(ops, ordered=False)
+    return len(ops)
+
+def rebuild_rollups(event_id=None):
+    """Recompute rollups from the raw items of one event (or all events)"""
+    _get_rollups_coll().delete_many({"event_id": event_id} if event_id else {})
+    for granularity in GRANULARITIES:
+        pipeline = _rollup_rebuild_stages(event_id, granularity) + [
+            {"$merge": {
+                "into": "rollups",
+                "on": ["event_id", "granularity", "bucket", "platform"],
+                "whenMatched": "replace",
+                "whenNotMatched": "insert",
+            }},
+        ]
+        _get_tweets_coll().aggregate(pipeline)
+    if event_id:
+        bump_data_version([event_id])
+    else:
+        _get_events_coll().update_many({}, {"$inc": {"data_version": 1}})
+    return _get_rollups_coll().count_documents({"event_id": event_id} if event_id else {})
+
+def _rollup_rebuild_stages(event_id=None, granularity="hour"):
+    match = {"created_at": {"$type": "date"}}
+    if event_id:
+        match["event_id"] = event_id
+
+    def is_label(label):
+        return {"$cond": [{"$eq": ["$sentiment", label]}, 1, 0]}
+
+    return [
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "event_id": "$event_id",
+                "bucket": {"$dateTrunc": {"date": "$created_at", "unit": granularity}},
+                "platform": {"$ifNull": ["$platform", "unknown"]},
+            },
+            "count": {"$sum": 1},
+            "polarity_sum": {"$sum": {"$ifNull": ["$polarity", 0]}},
+            **{l: {"$sum": is_label(l)} for l in SENTIMENT_LABELS},
+        }},
+        {"$project": {
+            "_id": 0,
+            "event_id": "$_id.event_id",
+            "granularity": granularity,
+            "bucket": "$_id.bucket",
+            "platform": "$_id.platform",
+            "count": 1,
+            "polarity_sum": 1,
+            **{l: 1 for l in SENTIMENT_LABELS},
+            "updated_at": "$$NOW",
+        }},
+    ]
+
+def _rollups_filter(event_id, first_bucket, last_bucket, granularities=("hour",)):
+    return {
+        "event_id": event_id,
+        "granularity": {"$in": list(granularities)},
+        "bucket": {"$gte": first_bucket, "$lte": last_bucket},
+    }
+
+def aggregate_event_metrics(event_id, pre_start, start, end, post_end, since=None, granularity="hour",
+                            series_start=None, series_end=None):
+    """Timeseries buckets, pre/during/post totals and platform counts from the rollups.
+
+    buckets come from the rollups at granularity within
+    series_start..series_end (default: pre_start..post_end); the totals always come
+    from the hourly ones, so the period split doesn't depend on the chart
+    resolution. With since, only buckets whose rollups changed at or
+    after that time are returned; the totals always cover the whole
+    window. as_of is the newest rollup change less
+    Config.METRICS_AS_OF_MARGIN_SECONDS, to pass back as the next since:
+    concurrent writers can make an earlier-stamped change visible after a
+    later one, and re-sending a bucket is harmless where missing it isn't.
+    """
+    first_hour = hour_bucket(pre_start)
+    # Rollups are hourly, so periods are split on the bucket containing start
+    period = {"$switch": {
+        "branches": [
+            {"case": {"$lt": ["$bucket", hour_bucket(start)]}, "then": "pre"},
+            {"case": {"$lte": ["$bucket", end]}, "then": "during"},
+        ],
+        "default": "post",
+    }}
+    hourly_only = {"$match": {"granularity": "hour", "bucket": {"$gte": first_hour}}}
+
+    series_start, series_end = series_start or pre_start, series_end or post_end
+    series_first = bucket_start(series_start, granularity)
+    buckets = [
+        {"$match": {"granularity": granularity,
+                    "bucket": {"$gte": series_first, "$lte": series_end}}},
+        {"$group": {
+            "_id": "$bucket",
+            "count": {"$sum": "$count"},
+            "updated_at": {"$max": "$updated_at"},
+            **{l: {"$sum": "$" + l} for l in SENTIMENT_LABELS},
+        }},
+    ]
+    if since:
+        buckets.append({"$match": {"updated_at": {"$gte": since}}})
+    buckets.append({"$sort": {"_id": 1}})
+
+    # Hourly rollups over the whole window for the totals, plus the series' own buckets
+    match = _rollups_filter(event_id, first_hour, post_end)
+    if granularity != "hour":
+        match = {"$or": [match, _rollups_filter(event_id, series_first, series_end, (granularity,))]}
+    pipeline = [
+        {"$match": match},
+        {"$facet": {
+            "buckets": buckets,
+            "periods": [
+                hourly_only,
+                {"$group": {
+                    "_id": period,
+                    "count": {"$sum": "$count"},
+                    "polarity_sum": {"$sum": "$polarity_sum"},
+                    **{l: {"$sum": "$" + l} for l in SENTIMENT_LABELS},
+                }},
+            ],
+            "platforms": [
+                hourly_only,
+                {"$group": {"_id": "$platform", "count": {"$sum": "$count"}}},
+            ],
+            "as_of": [
+                hourly_only,
+                {"$group": {"_id": None, "as_of": {"$max": "$updated_at"}}},
+            ],
+        }},
+    ]
+    result = list(_get_rollups_coll().aggregate(pipeline))
+    if not result:
+        return {"buckets": [], "periods": [], "platforms": [], "as_of": None}
+    agg = result[0]
+    newest = agg["as_of"][0]["as_of"] if agg["as_of"] else None
+    agg["as_of"] = newest - timedelta(seconds=Config.METRICS_AS_OF_MARGIN_SECONDS) if newest else None
+    return agg
+
+def _tweets_filter(event_id, start=None, end=None, sentiment=None):
     q = {"event_id": event_id}
     if sentiment:
         q['sentiment'] = sentiment
@@ -96,4 +604,351 @@ def count_tweets_filter(event_id, start=None, end=None, sentiment=None):
         q['created_at'] = {}
         if start: q['created_at']['$gte'] = start
         if end: q['created_at']['$lte'] = end
-    return _get_tweets_coll().count_documents(q)
+    return q
+
+def get_tweets_for_event(event_id, start=None, end=None, fields=ANALYTIC_FIELDS):
+    """An event's items in time order, projected to fields (covered by the index by default)"""
+    projection = dict({f: 1 for f in fields}, _id=0)
+    return list(_get_tweets_coll().find(_tweets_filter(event_id, start, end), projection).sort("created_at", 1))
+
+def iter_tweets_for_event(event_id, fields, batch_size=None):
+    """Stream an event's items in time order, projected to fields, from a batched cursor"""
+    projection = dict({f: 1 for f in fields}, _id=0)
+    cursor = (_get_tweets_coll()
+              .find(_tweets_filter(event_id), projection)
+              .sort("created_at", 1)
+              .batch_size(batch_size or Config.EXPORT_BATCH_SIZE))
+    try:
+        yield from cursor
+    finally:
+        cursor.close()
+
+def count_tweets_filter(event_id, start=None, end=None, sentiment=None):
+    return _get_tweets_coll().count_documents(_tweets_filter(event_id, start, end, sentiment))
+
+### Trending terms and top posts (maintained at ingest)
+def update_top_posts(summaries):
+    """Merge candidate top posts into the per-(event, hour) trends docs.
+
+    summaries are (event_id, bucket, [post, ...]). A post replaces the
+    stored entry with its external_id, so re-collected items carry their
+    current score, and the Config.TRENDS_TOP_POSTS highest by score, then
+    comments, are kept.
+    """
+    ops = []
+    for event_id, bucket, posts in summaries:
+        if not posts:
+            continue
+        ids = [p["external_id"] for p in posts]
+        ops.append(UpdateOne({"event_id": event_id, "bucket": bucket}, [{"$set": {
+            "top_posts": {"$slice": [
+                {"$sortArray": {
+                    "input": {"$concatArrays": [
+                        {"$filter": {"input": {"$ifNull": ["$top_posts", []]},
+                                     "cond": {"$not": [{"$in": ["$$this.external_id", {"$literal": ids}]}]}}},
+                        {"$literal": posts},
+                    ]},
+                    "sortBy": {"score": -1, "num_comments": -1},
+                }},
+                Config.TRENDS_TOP_POSTS,
+            ]},
+            "updated_at": "$$NOW",
+        }}], upsert=True))
+    if ops:
+        _get_trends_coll().bulk_write(ops, ordered=False)
+    return len(ops)
+
+def get_trend_sketch(event_id, bucket):
+    """An hour's stored term sketch as ({term: count}, {term: error}, version); version is None before the first save"""
+    doc = _get_trends_coll().find_one(
+        {"event_id": event_id, "bucket": bucket}, {"_id": 0, "terms": 1, "term_errors": 1, "sketch_version": 1}
+    ) or {}
+    return doc.get("terms") or {}, doc.get("term_errors") or {}, doc.get("sketch_version")
+
+def save_trend_sketch(event_id, bucket, terms, errors, version):
+    """Store an hour's term sketch if it is still at version (compare-and-set).
+
+    Returns False when another writer saved it first; the caller re-reads
+    and merges again, so concurrent flushes never lose each other's counts.
+    """
+    key = {"event_id": event_id, "bucket": bucket}
+    update = {"$set": {"terms": terms, "term_errors": errors, "sketch_version": (version or 0) + 1},
+              "$currentDate": {"updated_at": True}}
+    coll = _get_trends_coll()
+    if version is not None:
+        return coll.update_one(dict(key, sketch_version=version), update).matched_count == 1
+    try:
+        coll.update_one(dict(key, sketch_version={"$exists": False}), update, upsert=True)
+    except DuplicateKeyError:
+        return False  # the doc gained a sketch (or was created) concurrently
+    return True
+
+def get_trends(event_id, first_bucket, last_bucket):
+    """Trends docs of an event's hour buckets in first..last, in time order"""
+    return list(_get_trends_coll().find(
+        {"event_id": event_id, "bucket": {"$gte": first_bucket, "$lte": last_bucket}},
+        {"_id": 0, "bucket": 1, "terms": 1, "top_posts": 1},
+    ).sort("bucket", 1))
+
+def delete_trends(event_id=None):
+    return _get_trends_coll().delete_many({"event_id": event_id} if event_id else {}).deleted_count
+
+### Incremental collection watermarks
+def get_watermarks(event_id):
+    """{source: {newest_at, cursor, pending_newest_at}} for an event"""
+    return {
+        d["source"]: d
+        for d in _get_watermarks_coll().find(
+            {"event_id": event_id}, {"_id": 0, "source": 1, "newest_at": 1, "cursor": 1, "pending_newest_at": 1}
+        )
+    }
+
+def advance_watermark(event_id, source, newest_at):
+    """Move a source's watermark forward to newest_at (never backwards) and end any backfill"""
+    coll = _get_watermarks_coll()
+    key = {"event_id": event_id, "source": source}
+    try:
+        coll.update_one(key, {"$setOnInsert": {"newest_at": newest_at}}, upsert=True)
+    except DuplicateKeyError:
+        pass
+    coll.update_one(
+        {"$and": [key, {"$or": [{"newest_at": {"$lt": newest_at}}, {"newest_at": None}]}]},
+        {"$set": {"newest_at": newest_at, "updated_at": datetime.utcnow()}}
+    )
+    coll.update_one(key, {"$unset": {"cursor": "", "pending_newest_at": ""}})
+
+def save_backfill(event_id, source, cursor, pending_newest_at=None):
+    """Record where a walk that stopped short of the watermark should continue.
+
+    newest_at stays put, so nothing between it and cursor is skipped;
+    pending_newest_at is where it moves once the backfill completes.
+    """
+    update = {"$set": {"cursor": cursor, "updated_at": datetime.utcnow()}}
+    if pending_newest_at is not None:
+        update["$max"] = {"pending_newest_at": pending_newest_at}
+    _get_watermarks_coll().update_one({"event_id": event_id, "source": source}, update, upsert=True)
+
+### Collection job queue (shared by every worker process)
+def _job_out(doc):
+    if not doc:
+        return None
+    job = {k: (v.isoformat() if isinstance(v, datetime) else v) for k, v in doc.items() if k != "_id"}
+    job["job_id"] = str(doc["_id"])
+    return job
+
+def get_active_job(event_id):
+    return _job_out(_get_jobs_coll().find_one({"event_id": event_id, "active": True}))
+
+def get_latest_job(event_id):
+    return _job_out(_get_jobs_coll().find_one({"event_id": event_id}, sort=[("queued_at", -1)]))
+
+def count_queued_jobs():
+    return _get_jobs_coll().count_documents({"status": "queued"})
+
+def enqueue_job(event_id, max_attempts=None, full=False):
+    """Queue a collection job unless the event has an active one. Returns (job, created)"""
+    now = datetime.utcnow()
+    new_job = {
+        "event_id": event_id,
+        "full": bool(full),
+        "status": "queued",
+        "active": True,
+        "attempts": 0,
+        "max_attempts": max_attempts or Config.JOB_MAX_ATTEMPTS,
+        "sources": {},
+        "queued_at": now,
+        "started_at": None,
+        "finished_at": None,
+        "lease_expires": None,
+        "worker": None,
+        "error": None,
+    }
+    result = None
+    for _ in range(2):
+        try:
+            result = _get_jobs_coll().update_one(
+                {"event_id": event_id, "active": True}, {"$setOnInsert": new_job}, upsert=True
+            )
+            break
+        except DuplicateKeyError:
+            # Another request inserted the active job first; the retry matches it
+            continue
+    return get_active_job(event_id), result is not None and result.upserted_id is not None
+
+def _exhausted_jobs_filter(now):
+    return {"status": "running", "lease_expires": {"$lt": now}, "$expr": {"$gte": ["$attempts", "$max_attempts"]}}
+
+def _claimable_jobs_filter(now):
+    return {"$or": [
+        {"status": "queued"},
+        {"status": "running", "lease_expires": {"$lt": now}},
+    ]}
+
+def claim_job(worker_id, lease_seconds=None):
+    """Atomically take the oldest queued job, or one whose lease has expired"""
+    now = datetime.utcnow()
+    lease = timedelta(seconds=lease_seconds or Config.JOB_LEASE_SECONDS)
+    coll = _get_jobs_coll()
+    # Expired jobs that used up their attempts fail instead of being retried again
+    coll.update_many(
+        _exhausted_jobs_filter(now),
+        {"$set": {"status": "failed", "active": False, "finished_at": now, "error": "lease expired"}}
+    )
+    doc = coll.find_one_and_update(
+        _claimable_jobs_filter(now),
+        {
+            "$set": {"status": "running", "worker": worker_id, "started_at": now,
+                     "lease_expires": now + lease, "sources": {}},
+            "$inc": {"attempts": 1},
+        },
+        sort=[("queued_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+    return _job_out(doc)
+
+def heartbeat_job(job_id, worker_id, sources=None, lease_seconds=None):
+    """Extend a running job's lease. False means the lease was lost to another worker"""
+    update = {"lease_expires": datetime.utcnow() + timedelta(seconds=lease_seconds or Config.JOB_LEASE_SECONDS)}
+    if sources is not None:
+        update["sources"] = sources
+    result = _get_jobs_coll().update_one(
+        {"_id": ObjectId(job_id), "worker": worker_id, "status": "running"}, {"$set": update}
+    )
+    return result.modified_count == 1
+
+def finish_job(job_id, worker_id, sources=None, error=None):
+    """Mark a job done, or requeue it on error while attempts remain"""
+    coll = _get_jobs_coll()
+    job = coll.find_one({"_id": ObjectId(job_id), "worker": worker_id, "status": "running"})
+    if not job:
+        return None
+    now = datetime.utcnow()
+    update = {"sources": sources or job.get("sources", {}), "error": error, "lease_expires": None}
+    if error and job["attempts"] < job["max_attempts"]:
+        update.update(status="queued", worker=None)
+    else:
+        update.update(status="failed" if error else "done", active=False, finished_at=now)
+    coll.update_one({"_id": job["_id"], "worker": worker_id}, {"$set": update})
+    return update["status"]
+
+### Message stream (cross-process pub/sub)
+def publish_stream_message(channel, message):
+    _get_stream_coll().insert_one({"channel": channel, "message": message})
+
+def latest_stream_id():
+    """_id of the most recently inserted message (natural order), or None"""
+    doc = _get_stream_coll().find_one({}, {"_id": 1}, sort=[("$natural", -1)])
+    return doc["_id"] if doc else None
+
+def tail_stream(not_before=None, await_ms=1000):
+    """Tailable cursor over every channel's messages in insertion order.
+
+    not_before only trims what the server sends: ObjectIds are stamped by
+    each publisher's clock, so it is a lower bound with slack, not a position.
+    """
+    q = {"_id": {"$gte": ObjectId.from_datetime(not_before)}} if not_before else {}
+    return (_get_stream_coll()
+            .find(q, cursor_type=CursorType.TAILABLE_AWAIT)
+            .max_await_time_ms(await_ms))
+
+### Query plan verification
+def _query_shapes():
+    """(name, explain command) for each query this module issues, with sample values"""
+    now = datetime.utcnow()
+    event_id = str(ObjectId())
+    day_ago = now - timedelta(days=1)
+    return [
+        ("get_event", {"find": "events", "filter": {"_id": ObjectId(event_id)}}),
+        ("find_event_by_name", {"find": "events", "filter": {"name_key": normalize_event_name("Sample")}}),
+        ("list_events", {"find": "events", "filter": {}, "sort": {"created_at": -1}}),
+        ("get_tweets_for_event", {
+            "find": "tweets", "filter": _tweets_filter(event_id, day_ago, now), "sort": {"created_at": 1},
+            "projection": dict({f: 1 for f in ANALYTIC_FIELDS}, _id=0),
+        }),
+        ("iter_tweets_for_event", {
+            "find": "tweets", "filter": _tweets_filter(event_id), "sort": {"created_at": 1},
+            "projection": {"platform": 1, "created_at": 1, "_id": 0},
+        }),
+        ("count_tweets_filter", {"count": "tweets", "query": _tweets_filter(event_id, day_ago, now, "positive")}),
+        ("aggregate_event_metrics", {
+            "aggregate": "rollups", "pipeline": [{"$match": _rollups_filter(event_id, day_ago, now)}], "cursor": {},
+        }),
+        ("rebuild_rollups", {"aggregate": "tweets", "pipeline": _rollup_rebuild_stages(event_id), "cursor": {}}),
+        ("get_trends", {
+            "find": "trends", "filter": {"event_id": event_id, "bucket": {"$gte": day_ago, "$lte": now}},
+            "sort": {"bucket": 1},
+        }),
+        ("get_watermarks", {"find": "watermarks", "filter": {"event_id": event_id}}),
+        ("get_active_job", {"find": "jobs", "filter": {"event_id": event_id, "active": True}}),
+        ("get_latest_job", {"find": "jobs", "filter": {"event_id": event_id}, "sort": {"queued_at": -1}}),
+        ("count_queued_jobs", {"count": "jobs", "query": {"status": "queued"}}),
+        ("claim_job", {
+            "findAndModify": "jobs", "query": _claimable_jobs_filter(now), "sort": {"queued_at": 1},
+            "update": {"$inc": {"attempts": 1}},
+        }),
+        ("claim_job (expire)", {
+            "update": "jobs", "updates": [{"q": _exhausted_jobs_filter(now), "u": {"$set": {"active": False}}, "multi": True}],
+        }),
+    ]
+
+def _plan_stages(node):
+    """Every stage name in an explain document, ignoring rejected plans"""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == "rejectedPlans":
+                continue
+            if key == "stage" and isinstance(value, str):
+                yield value
+            else:
+                yield from _plan_stages(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _plan_stages(item)
+
+# Shapes that read only analytic fields and must be answered from the index alone
+COVERED_SHAPES = {"get_tweets_for_event"}
+
+def check_query_plans():
+    """Explain each query shape; returns {name: (problem, stages)} for plans that
+    use a COLLSCAN, or FETCH documents where the query should be covered"""
+    db = _get_connection()
+    problems = {}
+    for name, command in _query_shapes():
+        explained = db.command("explain", command, verbosity="queryPlanner")
+        stages = list(_plan_stages(explained))
+        if "COLLSCAN" in stages:
+            problems[name] = ("COLLSCAN", stages)
+        elif name in COVERED_SHAPES and "FETCH" in stages:
+            problems[name] = ("not covered", stages)
+    return problems
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Event Buzz Analyzer data maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rebuild = sub.add_parser("rebuild-rollups", help="Backfill minute/hour/day rollups from raw items")
+    rebuild.add_argument("--event-id", help="Only rebuild this event (default: all events)")
+    sub.add_parser("ensure-indexes", help="Run one-off migrations and create all indexes (once per deploy)")
+    sub.add_parser("backfill-name-keys", help="Add name_key to events created before it existed")
+    sub.add_parser("check-plans", help="Fail if any query in models.py plans a collection scan or loses its covering index")
+    args = parser.parse_args()
+
+    if args.command == "rebuild-rollups":
+        n = rebuild_rollups(args.event_id)
+        print(f"✅ Rebuilt {n} rollup buckets")
+    elif args.command == "ensure-indexes":
+        migrate(_get_connection())
+        print("✅ Migrations applied and indexes are in place")
+    elif args.command == "backfill-name-keys":
+        updated, duplicates = backfill_name_keys()
+        print(f"✅ Added name_key to {updated} events")
+        for event_id in duplicates:
+            print(f"⚠️  Event {event_id} duplicates an existing name and was left without a key")
+    elif args.command == "check-plans":
+        problems = check_query_plans()
+        for name, (problem, stages) in problems.items():
+            print(f"❌ {name}: {problem} ({' -> '.join(stages)})")
+        if problems:
+            raise SystemExit(1)
+        print(f"✅ All {len(_query_shapes())} query shapes use an index")
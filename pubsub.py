@@ -0,0 +1,152 @@
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import timedelta
+
+from config import Config
+from models import publish_stream_message, latest_stream_id, tail_stream
+
+def event_channel(event_id):
+    return f"event:{event_id}"
+
+class _MemorySubscription:
+    def __init__(self, broker, channel, max_pending):
+        self._broker = broker
+        self.channel = channel
+        self.queue = queue.Queue(maxsize=max_pending)
+
+    def get(self, timeout):
+        """Next message, or None if nothing arrived within timeout seconds"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self._broker._unsubscribe(self)
+
+class MemoryBroker:
+    """In-process pub/sub; only reaches subscribers in the publishing process"""
+
+    cross_process = False
+
+    def __init__(self, max_pending=100):
+        self.max_pending = max_pending
+        self._subs = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self._lock:
+            subs = list(self._subs.get(channel, ()))
+        for sub in subs:
+            try:
+                sub.queue.put_nowait(message)
+            except queue.Full:
+                pass  # a stalled client misses updates rather than growing memory
+
+    def subscribe(self, channel):
+        sub = _MemorySubscription(self, channel, self.max_pending)
+        with self._lock:
+            self._subs[channel].add(sub)
+        return sub
+
+    def _unsubscribe(self, sub):
+        with self._lock:
+            self._subs[sub.channel].discard(sub)
+            if not self._subs[sub.channel]:
+                del self._subs[sub.channel]
+
+class _MongoSubscription:
+    """Tails the stream collection in natural (insertion) order.
+
+    Client-made ObjectIds aren't ordered by insertion across processes or
+    clocks, so the position is the last document seen, found again by
+    identity whenever a cursor is (re)opened: everything up to it is
+    skipped, everything after it is new. If it has rolled out of the
+    capped collection, every document left is newer.
+    """
+
+    def __init__(self, channel):
+        self.channel = channel
+        self._last_id = latest_stream_id()
+        self._cursor = None
+        self._pending = deque()
+
+    def _open(self):
+        skew = timedelta(seconds=Config.STREAM_CLOCK_SKEW_SECONDS)
+        not_before = self._last_id.generation_time.replace(tzinfo=None) - skew if self._last_id else None
+        cursor = tail_stream(not_before)
+        if self._last_id is not None:
+            newer, seen = [], None
+            while True:
+                doc = cursor.try_next()
+                if doc is None:
+                    if not cursor.alive:
+                        return  # reopened on the next get()
+                    # Caught up without meeting the position: it rolled out
+                    self._pending.extend(d["message"] for d in newer)
+                    self._last_id = seen or self._last_id
+                    break
+                if doc["_id"] == self._last_id:
+                    break
+                seen = doc["_id"]
+                if doc.get("channel") == self.channel:
+                    newer.append(doc)
+        self._cursor = cursor
+
+    def get(self, timeout):
+        """Next message, or None if nothing arrived within timeout seconds"""
+        deadline = time.monotonic() + timeout
+        while True:
+            if self._pending:
+                return self._pending.popleft()
+            if self._cursor is None or not self._cursor.alive:
+                self._cursor = None
+                self._open()
+                if self._pending:
+                    continue
+            doc = self._cursor.try_next() if self._cursor is not None else None
+            if doc is not None:
+                self._last_id = doc["_id"]
+                if doc.get("channel") == self.channel:
+                    return doc["message"]
+                continue  # another event's message; read on while some are waiting
+            if time.monotonic() >= deadline:
+                return None
+            if self._cursor is None or not self._cursor.alive:
+                # Empty capped collection: tailable cursors die immediately, so back off
+                time.sleep(min(1.0, max(deadline - time.monotonic(), 0)))
+
+    def close(self):
+        if self._cursor is not None:
+            self._cursor.close()
+
+class MongoBroker:
+    """Pub/sub through a capped collection, so collector workers reach every web process"""
+
+    cross_process = True
+
+    def publish(self, channel, message):
+        publish_stream_message(channel, message)
+
+    def subscribe(self, channel):
+        return _MongoSubscription(channel)
+
+_broker = None
+_broker_lock = threading.Lock()
+
+def get_broker():
+    """Process-wide broker selected by Config.PUBSUB_BACKEND ("memory" or "mongo")"""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = MongoBroker() if Config.PUBSUB_BACKEND == "mongo" else MemoryBroker()
+        return _broker
+
+def publish(event_id, message):
+    """Best-effort publish; a broker failure never interrupts collection"""
+    try:
+        get_broker().publish(event_channel(event_id), message)
+    except Exception as e:
+        print(f"⚠️  Publish failed for event {event_id}: {e}")
@@ -0,0 +1,203 @@
+import queue
+import random
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from config import Config
+from models import enqueue_job, get_active_job, get_latest_job, count_queued_jobs, list_event_windows
+
+class QueueFull(Exception):
+    """Raised when a new collection job can't be queued"""
+
+class CollectionScheduler:
+    """Runs collection jobs on a fixed pool of worker threads.
+
+    At most one job per event is queued or running at a time; submitting
+    an event that already has one returns that job instead of a new one.
+    """
+
+    def __init__(self, workers=None, max_queue=None, history=None):
+        self.workers = workers or Config.COLLECTION_WORKERS
+        self.history = history or Config.COLLECTION_HISTORY
+        self._queue = queue.Queue(maxsize=max_queue or Config.COLLECTION_QUEUE_SIZE)
+        self._jobs = OrderedDict()
+        self._active = {}
+        self._latest = {}
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def _ensure_workers(self):
+        while len(self._threads) < self.workers:
+            t = threading.Thread(target=self._work, name=f"collection-worker-{len(self._threads)}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, event_id, full=False):
+        """Queue a job for event_id, or attach to its in-flight one.
+
+        A full job ignores the event's watermarks and re-collects its whole
+        window. Returns (job, created). Raises QueueFull when the queue is at
+        capacity.
+        """
+        with self._lock:
+            self._ensure_workers()
+            if event_id in self._active:
+                return dict(self._jobs[self._active[event_id]]), False
+
+            job = {
+                "job_id": uuid.uuid4().hex,
+                "event_id": event_id,
+                "full": bool(full),
+                "status": "queued",
+                "sources": {},
+                "queued_at": datetime.utcnow().isoformat(),
+                "started_at": None,
+                "finished_at": None,
+                "error": None,
+            }
+            try:
+                self._queue.put_nowait(job["job_id"])
+            except queue.Full:
+                raise QueueFull(f"collection queue is full ({self._queue.maxsize} jobs)")
+            self._jobs[job["job_id"]] = job
+            self._active[event_id] = job["job_id"]
+            self._latest[event_id] = job["job_id"]
+            self._prune()
+            return dict(job), True
+
+    def status(self, event_id):
+        """Latest job for event_id (queued, running or finished), or None"""
+        with self._lock:
+            job_id = self._latest.get(event_id)
+            if job_id not in self._jobs:
+                return None
+            job = dict(self._jobs[job_id])
+            job["sources"] = {k: dict(v) for k, v in job["sources"].items()}
+            return job
+
+    def _prune(self):
+        # Drop the oldest finished jobs beyond the history limit
+        finished = [jid for jid, j in self._jobs.items() if j["status"] in ("done", "failed")]
+        for job_id in finished[:max(len(self._jobs) - self.history, 0)]:
+            job = self._jobs.pop(job_id)
+            if self._latest.get(job["event_id"]) == job_id:
+                del self._latest[job["event_id"]]
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _progress(self, job_id, source, info):
+        with self._lock:
+            self._jobs[job_id]["sources"].setdefault(source, {}).update(info)
+
+    def _work(self):
+        # Only processes that run jobs pay for the collector's client libraries
+        from collector import run_collection
+        while True:
+            job_id = self._queue.get()
+            with self._lock:
+                event_id, full = self._jobs[job_id]["event_id"], self._jobs[job_id]["full"]
+            self._update(job_id, status="running", started_at=datetime.utcnow().isoformat())
+            try:
+                result = run_collection(event_id, progress=lambda source, info: self._progress(job_id, source, info),
+                                        full=full)
+                status = "done" if result is not None else "failed"
+                self._update(job_id, status=status, error=None if result else "event not found")
+            except Exception as e:
+                print(f"❌ Collection job {job_id} failed: {e}")
+                traceback.print_exc()
+                self._update(job_id, status="failed", error=str(e))
+            finally:
+                with self._lock:
+                    self._jobs[job_id]["finished_at"] = datetime.utcnow().isoformat()
+                    self._active.pop(event_id, None)
+                self._queue.task_done()
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler():
+    """Process-wide scheduler; worker threads start on the first submit"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = CollectionScheduler()
+        return _scheduler
+
+def submit_collection(event_id, full=False):
+    """Start (or attach to) a collection using the configured backend.
+
+    full re-collects the event's whole window instead of resuming from its watermarks.
+    """
+    if Config.COLLECTION_BACKEND == "mongo":
+        active = get_active_job(event_id)
+        if active:
+            return active, False
+        if count_queued_jobs() >= Config.COLLECTION_QUEUE_SIZE:
+            raise QueueFull(f"collection queue is full ({Config.COLLECTION_QUEUE_SIZE} jobs)")
+        return enqueue_job(event_id, full=full)
+    return get_scheduler().submit(event_id, full=full)
+
+def collection_status(event_id):
+    if Config.COLLECTION_BACKEND == "mongo":
+        return get_latest_job(event_id)
+    return get_scheduler().status(event_id)
+
+def active_events(now=None):
+    """Events whose collection window (start - 24h to end + 24h) includes now"""
+    from dateutil import parser
+    now = now or datetime.utcnow()
+    active = []
+    for ev in list_event_windows():
+        try:
+            start = parser.isoparse(ev["start_time"]).replace(tzinfo=None)
+            end = parser.isoparse(ev["end_time"]).replace(tzinfo=None)
+        except (KeyError, TypeError, ValueError):
+            continue
+        if start - timedelta(hours=24) <= now <= end + timedelta(hours=24):
+            active.append(ev)
+    return active
+
+def run_refresh_scheduler(interval=None, jitter=None, tick=30):
+    """Re-collect every active event about once per interval, spread out by jitter.
+
+    Collections resume from their watermarks, so each refresh only
+    fetches what is newer than the previous one.
+    """
+    interval = interval or Config.REFRESH_INTERVAL_SECONDS
+    jitter = Config.REFRESH_JITTER_SECONDS if jitter is None else jitter
+    next_due = {}
+    print(f"🔁 Refresh scheduler started: every {interval:.0f}s ± {jitter:.0f}s")
+    while True:
+        now = time.monotonic()
+        try:
+            events = active_events()
+        except Exception as e:
+            print(f"❌ Listing active events failed: {e}")
+            events = []
+        for ev in events:
+            # First sighting: spread initial runs across the jitter window
+            due = next_due.setdefault(ev["_id"], now + random.uniform(0, jitter))
+            if due > now:
+                continue
+            try:
+                job, created = submit_collection(ev["_id"])
+            except QueueFull:
+                print(f"⚠️  Queue full; refresh of {ev.get('name')} retried next tick")
+                continue
+            except Exception as e:
+                print(f"❌ Refresh of {ev.get('name')} failed: {e}")
+                continue
+            if created:
+                print(f"🔁 Refresh queued for {ev.get('name')} ({ev['_id']})")
+            next_due[ev["_id"]] = now + interval + random.uniform(-jitter, jitter)
+        active_ids = {ev["_id"] for ev in events}
+        for event_id in list(next_due):
+            if event_id not in active_ids:
+                del next_due[event_id]
+        time.sleep(tick)
@@ -0,0 +1,161 @@
+import hashlib
+import multiprocessing
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from config import Config
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_text(text):
+    """Collapse whitespace so reposts share a cache entry.
+
+    Case is kept: TextBlob scores some tokens (emoticons such as ":D")
+    differently once lowercased.
+    """
+    return _WHITESPACE.sub(" ", text or "").strip()
+
+def text_key(normalized):
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
+def label_for(polarity):
+    if polarity > 0.05:
+        return "positive"
+    if polarity < -0.05:
+        return "negative"
+    return "neutral"
+
+def _score_texts(texts):
+    """Pool worker entry point: polarity for each text"""
+    from textblob import TextBlob
+    return [round(TextBlob(t).sentiment.polarity, 4) for t in texts]
+
+class SentimentEngine:
+    """Scores text in batches across a process pool, memoized in a bounded LRU.
+
+    Results keep the {"polarity", "label"} contract of analyze_sentiment.
+    Misses are split into one chunk per worker so a single batch uses the
+    whole pool; batches with fewer than inline_max misses are scored inline,
+    since shipping them to a worker costs more than scoring them.
+    """
+
+    def __init__(self, workers=None, batch_size=None, cache_size=None, inline_max=None):
+        self.workers = Config.SENTIMENT_WORKERS if workers is None else workers
+        self.batch_size = batch_size or Config.SENTIMENT_BATCH_SIZE
+        self.cache_size = cache_size or Config.SENTIMENT_CACHE_SIZE
+        self.inline_max = Config.SENTIMENT_INLINE_MAX if inline_max is None else inline_max
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.scored = 0
+        self.scoring_seconds = 0.0
+
+    def _get_pool(self):
+        # Reddit and YouTube fetch threads score concurrently; create one pool between them
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def _discard_pool(self, pool):
+        with self._pool_lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False)
+
+    def score(self, text):
+        return self.score_batch([text])[0]
+
+    def score_batch(self, texts):
+        normalized = [normalize_text(t) for t in texts]
+        keys = [text_key(n) for n in normalized]
+
+        polarities = {}
+        with self._lock:
+            for key in keys:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    polarities[key] = self._cache[key]
+                    self.hits += 1
+                else:
+                    self.misses += 1
+
+        # Score each distinct uncached text once, as written
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in polarities:
+                missing.setdefault(key, text or "")
+        if missing:
+            polarities.update(self._score_missing(missing))
+
+        return [{"polarity": polarities[k], "label": label_for(polarities[k])} for k in keys]
+
+    def _score_missing(self, missing):
+        keys = list(missing)
+        texts = [missing[k] for k in keys]
+        started = time.perf_counter()
+        if self.workers > 1 and len(texts) >= max(self.inline_max, 2):
+            # About one chunk per worker, capped at batch_size texts each
+            size = min(self.batch_size, -(-len(texts) // self.workers))
+            chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+            pool = self._get_pool()
+            try:
+                scores = [p for chunk in pool.map(_score_texts, chunks) for p in chunk]
+            except BrokenProcessPool:
+                # A worker died (OOM kill, crash); the next batch gets a fresh pool
+                print("⚠️  Sentiment pool broke, scoring this batch inline")
+                self._discard_pool(pool)
+                scores = _score_texts(texts)
+        else:
+            scores = _score_texts(texts)
+        elapsed = time.perf_counter() - started
+
+        result = dict(zip(keys, scores))
+        with self._lock:
+            self.scored += len(texts)
+            self.scoring_seconds += elapsed
+            for key, polarity in result.items():
+                self._cache[key] = polarity
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "workers": self.workers,
+                "cache_entries": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "scored": self.scored,
+                "items_per_second": round(self.scored / self.scoring_seconds, 1) if self.scoring_seconds else 0.0,
+            }
+
+    def shutdown(self):
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    """Process-wide engine, so the cache is shared by every collection"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = SentimentEngine()
+        return _engine
@@ -1,14 +1,18 @@
+// Create label strings instead of Date objects for simpler handling
+function formatBucketLabel(t) {
+  const d = new Date(t);
+  return d.toLocaleString('en-US', { month: '2-digit', day: '2-digit', hour: '2-digit', minute: '2-digit' });
+}
+
 window.renderCharts = function(timeseries) {
   if (!timeseries || !timeseries.times) {
     console.warn("Invalid timeseries data");
     return;
   }
 
-  // Create label strings instead of Date objects for simpler handling
-  const labels = timeseries.times.map(t => {
-    const d = new Date(t);
-    return d.toLocaleString('en-US', { month: '2-digit', day: '2-digit', hour: '2-digit', minute: '2-digit' });
-  });
+  // Raw bucket times, so later deltas can be matched to chart positions
+  window.chartTimes = timeseries.times.slice();
+  const labels = timeseries.times.map(formatBucketLabel);
 
   // --- Volume Chart ---
   const volumeCtx = document.getElementById("volumeChart");
@@ -144,3 +148,39 @@ window.renderCharts = function(timeseries) {
     }
   });
 };
+
+// Patch changed/new buckets from a delta response into the existing charts
+window.updateCharts = function(timeseries) {
+  if (!window.volumeChartInstance || !window.sentimentChartInstance || !window.chartTimes) {
+    window.renderCharts(timeseries);
+    return;
+  }
+  if (!timeseries || !timeseries.times || timeseries.times.length === 0) return;
+
+  const volume = window.volumeChartInstance;
+  const sentiment = window.sentimentChartInstance;
+  const series = [
+    [volume.data.datasets[0], timeseries.counts],
+    [sentiment.data.datasets[0], timeseries.positive],
+    [sentiment.data.datasets[1], timeseries.neutral],
+    [sentiment.data.datasets[2], timeseries.negative]
+  ];
+
+  timeseries.times.forEach((t, i) => {
+    let idx = window.chartTimes.indexOf(t);
+    if (idx === -1) {
+      // New bucket: insert it in time order
+      idx = window.chartTimes.findIndex(existing => new Date(existing) > new Date(t));
+      if (idx === -1) idx = window.chartTimes.length;
+      window.chartTimes.splice(idx, 0, t);
+      volume.data.labels.splice(idx, 0, formatBucketLabel(t));
+      sentiment.data.labels.splice(idx, 0, formatBucketLabel(t));
+      series.forEach(([dataset, values]) => dataset.data.splice(idx, 0, (values || [])[i] || 0));
+    } else {
+      series.forEach(([dataset, values]) => { dataset.data[idx] = (values || [])[i] || 0; });
+    }
+  });
+
+  volume.update('none');
+  sentiment.update('none');
+};
@@ -10,20 +10,30 @@ document.addEventListener("DOMContentLoaded", function(){
     if (loading) loading.style.display = "none"; 
   }
 
+  // as_of of the last response; later polls ask only for buckets changed since then
+  let metricsAsOf = null;
+
   async function fetchMetrics(){
     showLoading();
     try {
-      const r = await fetch(`/api/metrics/${EVENT_ID}`);
+      const url = metricsAsOf
+        ? `/api/metrics/${EVENT_ID}?since=${encodeURIComponent(metricsAsOf)}`
+        : `/api/metrics/${EVENT_ID}`;
+      const r = await fetch(url);
       if (!r.ok) {
         throw new Error(`HTTP error! status: ${r.status}`);
       }
       const data = await r.json();
       hideLoading();
       
-      if (window.renderCharts) {
+      if (data.delta && window.updateCharts) {
+        window.updateCharts(data.timeseries);
+      } else if (window.renderCharts) {
         window.renderCharts(data.timeseries);
       }
+      if (data.as_of) metricsAsOf = data.as_of;
       renderSummary(data.summary);
+      fetchTrends();
     } catch(e){
       hideLoading();
       console.error("Error fetching metrics:", e);
@@ -46,7 +56,7 @@ document.addEventListener("DOMContentLoaded", function(){
         alert.className = 'alert alert-success alert-dismissible fade show';
         alert.innerHTML = `
           <strong>Analysis Started!</strong> Data collection from Reddit, YouTube, and News is now running in the background. 
-          This may take a few minutes. Refresh the page to see updated metrics.
+          This may take a few minutes. Metrics update automatically as data arrives.
           <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
         `;
         const container = document.querySelector('.container-fluid');
@@ -158,6 +168,50 @@ document.addEventListener("DOMContentLoaded", function(){
     renderRecommendations(s);
   }
 
+  async function fetchTrends() {
+    try {
+      const r = await fetch(`/api/trends/${EVENT_ID}?limit=15`);
+      if (!r.ok) throw new Error(`HTTP error! status: ${r.status}`);
+      renderTrends(await r.json());
+    } catch(e) {
+      console.error("Error fetching trends:", e);
+    }
+  }
+
+  // Post text comes from third parties, so it is only ever set as textContent
+  function renderTrends(data) {
+    const termsDiv = document.getElementById("trendingTerms");
+    const postsList = document.getElementById("topPosts");
+    if (!termsDiv || !postsList) return;
+
+    termsDiv.replaceChildren();
+    if (!data.terms || data.terms.length === 0) {
+      const empty = document.createElement("p");
+      empty.className = "text-muted mb-0";
+      empty.textContent = "No trending terms yet";
+      termsDiv.appendChild(empty);
+    }
+    (data.terms || []).forEach(t => {
+      const badge = document.createElement("span");
+      badge.className = "badge bg-light text-dark border me-1 mb-1";
+      badge.textContent = `${t.term} ${t.count}`;
+      termsDiv.appendChild(badge);
+    });
+
+    postsList.replaceChildren();
+    (data.top_posts || []).forEach(p => {
+      const item = document.createElement("li");
+      item.className = "list-group-item px-0";
+      const meta = document.createElement("div");
+      meta.className = "text-muted";
+      meta.textContent = `${p.platform} · ${p.score} points · ${p.num_comments} comments`;
+      const text = document.createElement("div");
+      text.textContent = p.text;
+      item.append(meta, text);
+      postsList.appendChild(item);
+    });
+  }
+
   function formatPolarity(val) {
     if (val === null || val === undefined) return "N/A";
     const percentage = Math.round((val + 1) / 2 * 100);
@@ -238,9 +292,55 @@ document.addEventListener("DOMContentLoaded", function(){
     return recs;
   }
 
+  // Live updates over Server-Sent Events; polling is only a fallback
+  let streamConnected = false;
+  let refreshTimer = null;
+  const sourceStates = {};
+
+  // Coalesce bursts of ingest messages into one delta fetch
+  function scheduleRefresh() {
+    if (refreshTimer) return;
+    refreshTimer = setTimeout(() => {
+      refreshTimer = null;
+      fetchMetrics();
+    }, 2000);
+  }
+
+  function renderProgress(msg) {
+    const elem = document.getElementById("collectionProgress");
+    if (!elem) return;
+    if (msg.type === "collection" && msg.state === "started") {
+      Object.keys(sourceStates).forEach(k => delete sourceStates[k]);
+      (msg.sources || []).forEach(name => { sourceStates[name] = "queued"; });
+    } else if (msg.type === "progress") {
+      sourceStates[msg.source] = msg.count !== undefined ? `${msg.state} (${msg.count})` : msg.state;
+    }
+    const parts = Object.entries(sourceStates).map(([name, state]) => `${name}: ${state}`);
+    if (msg.type === "collection" && msg.state === "done") {
+      parts.push(`finished in ${Math.round(msg.duration)}s`);
+    }
+    elem.textContent = parts.join(" · ");
+  }
+
+  if (window.EventSource && typeof STREAM_ENABLED !== "undefined" && STREAM_ENABLED) {
+    const source = new EventSource(`/stream/${EVENT_ID}`);
+    // Polling only stops once the server confirms the stream sees every process's updates
+    source.addEventListener("hello", e => { streamConnected = !!JSON.parse(e.data).cross_process; });
+    source.onerror = () => { streamConnected = false; };
+    source.addEventListener("metrics", scheduleRefresh);
+    source.addEventListener("progress", e => renderProgress(JSON.parse(e.data)));
+    source.addEventListener("collection", e => {
+      const msg = JSON.parse(e.data);
+      renderProgress(msg);
+      if (msg.state === "done") scheduleRefresh();
+    });
+  }
+
   // Initial fetch on page load
   fetchMetrics();
   
-  // Auto-refresh every 30 seconds
-  setInterval(fetchMetrics, 30000);
+  // Auto-refresh every 30 seconds unless a cross-process live stream is up
+  setInterval(() => {
+    if (!streamConnected) fetchMetrics();
+  }, 30000);
 });
@@ -0,0 +1,269 @@
+import atexit
+import json
+import os
+try:
+    import fcntl
+except ImportError:  # Windows: exited processes' files are never folded
+    fcntl = None
+import threading
+import time
+from contextlib import contextmanager
+
+from config import Config
+
+# Upper bounds (seconds) for latency histograms; +Inf is implied
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+HELP = {
+    "eventbuzz_http_request_seconds": "Flask request handling time",
+    "eventbuzz_metrics_stage_seconds": "Time per stage of building an /api/metrics response",
+    "eventbuzz_metrics_cache_total": "/api/metrics responses by cache outcome",
+    "eventbuzz_fetch_seconds": "Collector fetch time per source",
+    "eventbuzz_fetch_total": "Collector fetches per source and outcome",
+    "eventbuzz_sentiment_seconds": "Time to score one batch of texts",
+    "eventbuzz_sentiment_items_total": "Texts scored",
+    "eventbuzz_db_write_seconds": "Time per ingest write",
+    "eventbuzz_trends_seconds": "Time to fold one flush of written items into the trends",
+    "eventbuzz_items_ingested_total": "New items written, per platform",
+    "eventbuzz_items_updated_total": "Existing items re-written, per writer",
+}
+
+class Registry:
+    """Counters and histograms for this process.
+
+    Each process periodically writes its values to its own file in
+    Config.METRICS_DIR, named by pid and start time so a reused pid never
+    overwrites an exited process's totals. render() sums every file
+    there, so /metrics on any gunicorn worker reports the totals of all of
+    them. Before summing, the files of exited processes are folded into
+    one retired.json, so counters never go backwards and the directory
+    doesn't grow as gunicorn recycles workers.
+    """
+
+    def __init__(self, directory=None, flush_interval=None):
+        self.directory = directory or Config.METRICS_DIR
+        self.flush_interval = flush_interval or Config.METRICS_FLUSH_SECONDS
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget this process's values (the state a forked child inherits)"""
+        self._counters = {}
+        self._histograms = {}
+        self._pid = os.getpid()
+        self._filename = f"metrics-{self._pid}-{time.time_ns()}.json"
+        self._flusher = None
+        self._dirty = False
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+            self._dirty = True
+        self._ensure_flusher()
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            h = self._histograms.get(key)
+            if h is None:
+                h = self._histograms[key] = {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    h["buckets"][i] += 1
+                    break
+            h["sum"] += seconds
+            h["count"] += 1
+            self._dirty = True
+        self._ensure_flusher()
+
+    @contextmanager
+    def timed(self, name, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def _ensure_flusher(self):
+        if self._flusher is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self.reset()
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="telemetry-flush", daemon=True)
+                self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def _snapshot(self):
+        with self._lock:
+            self._dirty = False
+            return {
+                "counters": [[n, list(l), v] for (n, l), v in self._counters.items()],
+                "histograms": [[n, list(l), dict(h, buckets=list(h["buckets"]))]
+                               for (n, l), h in self._histograms.items()],
+            }
+
+    def flush(self):
+        """Write this process's values to its file (atomically) if they changed"""
+        if not self._dirty:
+            return
+        snapshot = self._snapshot()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, self._filename)
+            tmp = f"{path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"⚠️  Writing metrics failed: {e}")
+
+    def _process_files(self):
+        try:
+            return [n for n in os.listdir(self.directory) if n.startswith("metrics-") and n.endswith(".json")]
+        except FileNotFoundError:
+            return []
+
+    @contextmanager
+    def _directory_lock(self, exclusive):
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, "retired.lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _retire(self):
+        """Fold the files of exited processes into retired.json and delete them"""
+        if fcntl is None:
+            return
+        dead = [n for n in self._process_files() if _file_pid(n) is not None and not _alive(_file_pid(n))]
+        if not dead:
+            return
+        path = os.path.join(self.directory, "retired.json")
+        with self._directory_lock(exclusive=True):
+            retired = _load(path) or {"counters": [], "histograms": [], "folded": []}
+            # Names folded by a pass that died before deleting them must not be added twice
+            present = set(self._process_files())
+            folded = {n for n in retired["folded"] if n in present}
+            counters, histograms = _add({}, {}, retired)
+            newly = []
+            for name in dead:
+                if name in folded:
+                    continue
+                snapshot = _load(os.path.join(self.directory, name))
+                if snapshot is not None:
+                    _add(counters, histograms, snapshot)
+                    newly.append(name)
+            retired = dict(_dump(counters, histograms), folded=sorted(folded | set(newly)))
+            try:
+                tmp = f"{path}.tmp"
+                with open(tmp, "w") as f:
+                    json.dump(retired, f)
+                os.replace(tmp, path)
+                for name in retired["folded"]:
+                    os.remove(os.path.join(self.directory, name))
+            except OSError as e:
+                print(f"⚠️  Retiring metrics files failed: {e}")
+
+    def _merged(self):
+        self._retire()
+        counters, histograms = {}, {}
+        with self._directory_lock(exclusive=False):
+            for filename in self._process_files() + ["retired.json"]:
+                snapshot = _load(os.path.join(self.directory, filename))
+                if snapshot is not None:
+                    _add(counters, histograms, snapshot)
+        return counters, histograms
+
+    def render(self):
+        """Every process's values in the Prometheus text exposition format"""
+        self.flush()
+        counters, histograms = self._merged()
+        lines = []
+        for name in sorted({n for n, _ in counters}):
+            lines += [f"# HELP {name} {HELP.get(name, name)}", f"# TYPE {name} counter"]
+            for (n, labels), value in sorted(counters.items()):
+                if n == name:
+                    lines.append(f"{name}{_labels(labels)} {value}")
+        for name in sorted({n for n, _ in histograms}):
+            lines += [f"# HELP {name} {HELP.get(name, name)}", f"# TYPE {name} histogram"]
+            for (n, labels), h in sorted(histograms.items()):
+                if n != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(BUCKETS, h["buckets"]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', repr(float(bound))),))} {cumulative}")
+                lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {h['count']}")
+                lines.append(f"{name}_sum{_labels(labels)} {h['sum']}")
+                lines.append(f"{name}_count{_labels(labels)} {h['count']}")
+        return "\n".join(lines) + "\n"
+
+def _file_pid(filename):
+    try:
+        return int(filename[len("metrics-"):-len(".json")].split("-")[0])
+    except ValueError:
+        return None
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass  # exists, but owned by another user
+    return True
+
+def _load(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None  # missing, mid-replace or truncated; picked up on the next scrape
+
+def _add(counters, histograms, snapshot):
+    """Sum a snapshot's values into counters and histograms (keyed by name and labels)"""
+    for name, labels, value in snapshot["counters"]:
+        key = (name, tuple(map(tuple, labels)))
+        counters[key] = counters.get(key, 0) + value
+    for name, labels, h in snapshot["histograms"]:
+        key = (name, tuple(map(tuple, labels)))
+        merged = histograms.setdefault(key, {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0})
+        merged["buckets"] = [a + b for a, b in zip(merged["buckets"], h["buckets"])]
+        merged["sum"] += h["sum"]
+        merged["count"] += h["count"]
+    return counters, histograms
+
+def _dump(counters, histograms):
+    return {
+        "counters": [[n, list(l), v] for (n, l), v in counters.items()],
+        "histograms": [[n, list(l), h] for (n, l), h in histograms.items()],
+    }
+
+def _labels(labels):
+    if not labels:
+        return ""
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels) + "}"
+
+registry = Registry()
+inc = registry.inc
+observe = registry.observe
+timed = registry.timed
+render = registry.render
+
+atexit.register(registry.flush)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=registry.reset)
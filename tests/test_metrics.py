@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta
+
+from app import bucket_range, lttb_indices, pick_resolution
+
+START = datetime(2026, 1, 1)
+
+def test_bucket_range_is_inclusive_of_partial_buckets():
+    buckets = list(bucket_range(START + timedelta(minutes=30), START + timedelta(hours=2, minutes=1)))
+    assert buckets == [START + timedelta(hours=h) for h in range(4)]
+
+def test_pick_resolution_auto_is_the_finest_that_fits():
+    assert pick_resolution(START, START + timedelta(hours=6), 500) == "minute"
+    assert pick_resolution(START, START + timedelta(days=3), 500) == "hour"
+    assert pick_resolution(START, START + timedelta(days=365), 500) == "day"
+
+def test_pick_resolution_never_goes_finer_than_asked():
+    assert pick_resolution(START, START + timedelta(hours=1), 500, finest="hour") == "hour"
+
+def test_minute_view_of_a_day_fits_the_downsample_bound():
+    # One day (e.g. ?start=&end= on /api/metrics) at the default 500 points x 4
+    assert pick_resolution(START, START + timedelta(days=1), 2000, finest="minute") == "minute"
+    # The whole analysis window of a one-day event (24h either side) doesn't
+    assert pick_resolution(START, START + timedelta(days=3), 2000, finest="minute") == "hour"
+
+def test_lttb_keeps_short_series_whole():
+    assert lttb_indices([1, 2, 3], 5) == [0, 1, 2]
+
+def test_lttb_keeps_endpoints_and_peaks():
+    values = [0] * 100
+    values[37] = 50
+    values[71] = -20
+    kept = lttb_indices(values, 10)
+    assert len(kept) == 10
+    assert kept[0] == 0 and kept[-1] == 99
+    assert 37 in kept and 71 in kept
+    assert kept == sorted(kept)
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from pymongo import InsertOne, UpdateOne
+
+from models import INSERT_ONLY_FIELDS, _item_op
+
+def item(**fields):
+    doc = {"event_id": "e1", "platform": "reddit", "external_id": "p1", "text": "edited text",
+           "created_at": datetime(2026, 1, 1, 5), "sentiment": "positive", "polarity": 0.5,
+           "metrics": {"score": 40}, "source": "reddit_submission", "cached_at": datetime(2026, 1, 2)}
+    doc.update(fields)
+    return doc
+
+def test_upsert_keeps_rollup_fields_from_the_first_insert():
+    doc = item()
+    assert _item_op(doc) == UpdateOne(
+        {"event_id": "e1", "platform": "reddit", "external_id": "p1"},
+        {
+            "$set": {"event_id": "e1", "platform": "reddit", "external_id": "p1", "text": "edited text",
+                     "metrics": {"score": 40}, "source": "reddit_submission"},
+            "$setOnInsert": {k: doc[k] for k in INSERT_ONLY_FIELDS},
+        },
+        upsert=True,
+    )
+
+def test_item_without_external_id_is_inserted():
+    assert isinstance(_item_op(item(external_id=None)), InsertOne)
@@ -0,0 +1,74 @@
+from bson.objectid import ObjectId
+
+import pubsub
+
+class FakeStream:
+    """A capped collection in insertion order, tailed by fake cursors"""
+
+    def __init__(self):
+        self.docs = []
+
+    def publish(self, channel, message, _id=None):
+        self.docs.append({"_id": _id or ObjectId(), "channel": channel, "message": message})
+
+    def latest(self):
+        return self.docs[-1]["_id"] if self.docs else None
+
+    def tail(self, not_before=None, await_ms=1000):
+        return FakeCursor(self)
+
+class FakeCursor:
+    def __init__(self, stream):
+        self.stream = stream
+        self.position = 0
+        self.alive = True
+
+    def try_next(self):
+        if self.position < len(self.stream.docs):
+            self.position += 1
+            return self.stream.docs[self.position - 1]
+        return None
+
+    def close(self):
+        self.alive = False
+
+def subscribe(monkeypatch, stream, channel="event:e1"):
+    monkeypatch.setattr(pubsub, "latest_stream_id", stream.latest)
+    monkeypatch.setattr(pubsub, "tail_stream", stream.tail)
+    return pubsub.MongoBroker().subscribe(channel)
+
+def test_messages_with_lower_ids_inserted_later_are_delivered(monkeypatch):
+    stream = FakeStream()
+    later, earlier = ObjectId(), ObjectId()
+    stream.publish("event:e1", "before subscribing", _id=later)
+    sub = subscribe(monkeypatch, stream)
+    # Another process's id sorts below the last one seen but was inserted after it
+    stream.publish("event:e1", "from another process", _id=ObjectId(str(earlier)[:8] + "0" * 16))
+    stream.publish("event:e2", "other channel")
+    stream.publish("event:e1", "next")
+    assert [sub.get(0), sub.get(0), sub.get(0)] == ["from another process", "next", None]
+
+def test_reopened_cursor_resumes_after_the_last_message_seen(monkeypatch):
+    stream = FakeStream()
+    stream.publish("event:e1", "old")
+    sub = subscribe(monkeypatch, stream)
+    stream.publish("event:e1", "one")
+    assert sub.get(0) == "one"
+    sub._cursor.alive = False
+    stream.publish("event:e1", "two")
+    assert [sub.get(0), sub.get(0)] == ["two", None]
+
+def test_position_rolled_out_of_the_collection_delivers_everything_left(monkeypatch):
+    stream = FakeStream()
+    stream.publish("event:e1", "old")
+    sub = subscribe(monkeypatch, stream)
+    stream.docs.clear()  # capped rollover removed the position
+    stream.publish("event:e1", "one")
+    stream.publish("event:e1", "two")
+    assert [sub.get(0), sub.get(0), sub.get(0)] == ["one", "two", None]
+
+def test_empty_collection_at_subscribe_delivers_everything_later(monkeypatch):
+    stream = FakeStream()
+    sub = subscribe(monkeypatch, stream)
+    stream.publish("event:e1", "first")
+    assert sub.get(0) == "first"
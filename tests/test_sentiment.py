@@ -0,0 +1,65 @@
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import sentiment
+from sentiment import SentimentEngine, normalize_text
+
+class FakePool:
+    def __init__(self, broken=False):
+        self.broken = broken
+        self.chunks = []
+
+    def map(self, fn, chunks):
+        if self.broken:
+            raise BrokenProcessPool("a child process terminated abruptly")
+        chunks = list(chunks)
+        self.chunks.append([len(c) for c in chunks])
+        return [fn(c) for c in chunks]
+
+    def shutdown(self, wait=True):
+        pass
+
+@pytest.fixture(autouse=True)
+def scored(monkeypatch):
+    """Texts that reached the scorer, which returns a fixed polarity"""
+    calls = []
+
+    def score_texts(texts):
+        calls.append(list(texts))
+        return [0.5] * len(texts)
+    monkeypatch.setattr(sentiment, "_score_texts", score_texts)
+    return calls
+
+def test_cache_key_only_collapses_whitespace():
+    assert normalize_text("  This is\nGREAT  :D ") == "This is GREAT :D"
+
+def test_reposts_are_scored_once_from_the_original_text(scored):
+    engine = SentimentEngine(workers=1, cache_size=10)
+    results = engine.score_batch(["GREAT :D", "GREAT  :D", "fine"])
+    assert [r["label"] for r in results] == ["positive"] * 3
+    assert scored == [["GREAT :D", "fine"]]
+
+def test_misses_are_split_across_the_workers():
+    engine = SentimentEngine(workers=4, batch_size=64, cache_size=1000, inline_max=8)
+    engine._pool = pool = FakePool()
+    engine.score_batch([f"post {i}" for i in range(50)])
+    assert pool.chunks == [[13, 13, 13, 11]]
+
+def test_small_batches_are_scored_inline(scored):
+    engine = SentimentEngine(workers=4, cache_size=10, inline_max=8)
+    engine._pool = pool = FakePool()
+    engine.score_batch(["a", "b"])
+    assert pool.chunks == [] and scored == [["a", "b"]]
+
+def test_broken_pool_scores_inline_and_is_replaced(monkeypatch, scored):
+    engine = SentimentEngine(workers=2, cache_size=100, inline_max=2)
+    engine._pool = FakePool(broken=True)
+    results = engine.score_batch([f"post {i}" for i in range(10)])
+    assert len(results) == 10 and len(scored) == 1
+    assert engine._pool is None
+
+    fresh = FakePool()
+    monkeypatch.setattr(sentiment, "ProcessPoolExecutor", lambda **kwargs: fresh)
+    engine.score_batch([f"new {i}" for i in range(10)])
+    assert engine._pool is fresh and fresh.chunks == [[5, 5]]
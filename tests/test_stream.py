@@ -0,0 +1,26 @@
+import threading
+
+import pytest
+
+import app as app_module
+from pubsub import MemoryBroker
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app_module, "get_event", lambda event_id: {"_id": event_id, "name": "Launch"})
+    monkeypatch.setattr(app_module, "get_broker", lambda: MemoryBroker())
+    monkeypatch.setattr(app_module, "stream_slots", threading.BoundedSemaphore(1))
+    monkeypatch.setitem(app_module.app.config, "SSE_ENABLED", True)
+    return app_module.app.test_client()
+
+def test_streams_over_the_cap_get_204_until_one_closes(client):
+    first = client.get("/stream/e1", buffered=False)
+    assert first.status_code == 200
+    assert next(first.response).startswith(b"retry:")
+
+    assert client.get("/stream/e1").status_code == 204
+
+    first.close()
+    again = client.get("/stream/e1", buffered=False)
+    assert again.status_code == 200
+    again.close()
@@ -0,0 +1,80 @@
+from datetime import datetime
+
+import trends
+from trends import SpaceSaving, merge_hour_sketch, merge_terms, summarize, tokenize
+
+def test_tokenize_drops_stopwords_and_short_tokens():
+    assert tokenize("The Launch was GREAT, we're so in!") == ["launch", "great"]
+
+def test_space_saving_keeps_frequent_items_within_capacity():
+    sketch = SpaceSaving(capacity=3)
+    for item in ["a"] * 10 + ["b", "c", "d", "e", "f"] + ["a"] * 5:
+        sketch.offer(item)
+    assert len(sketch.counts) == 3
+    assert sketch.top(1) == [("a", 15)]
+    # Evicted counters are inherited as error, never undercounted
+    for item, count in sketch.counts.items():
+        assert count - sketch.errors[item] <= {"a": 15}.get(item, 1)
+
+def test_floor_is_zero_until_full():
+    sketch = SpaceSaving(capacity=2, counts={"a": 4})
+    assert sketch.floor() == 0
+    sketch.offer("b")
+    assert sketch.floor() == 1
+
+def test_merge_charges_the_other_sides_floor():
+    stored = SpaceSaving(capacity=2, counts={"a": 5, "b": 3})
+    batch = SpaceSaving(capacity=10, counts={"c": 1})
+    stored.merge(batch)
+    assert stored.counts == {"a": 5, "c": 4}
+    assert stored.errors == {"a": 0, "c": 3}
+
+def test_term_seen_once_per_flush_survives_a_full_hour():
+    # An hour already holding 200 terms seen twice; "steady" arrives once in each of 200 flushes
+    stored = SpaceSaving(capacity=200, counts={f"old{i}": 2 for i in range(200)})
+    for _ in range(200):
+        batch = SpaceSaving(capacity=100)
+        batch.offer("steady")
+        stored.merge(batch)
+    assert stored.top(1)[0][0] == "steady"
+    assert stored.counts["steady"] - stored.errors["steady"] <= 200 <= stored.counts["steady"]
+
+def test_merge_hour_sketch_retries_when_another_writer_saved_first(monkeypatch):
+    store = {"terms": {"rival": 7}, "errors": {}, "version": 1}
+    conflicts = [True]
+
+    def get(event_id, bucket):
+        return dict(store["terms"]), dict(store["errors"]), store["version"]
+
+    def save(event_id, bucket, terms, errors, version):
+        if conflicts:
+            conflicts.pop()
+            store["terms"]["rival"] += 1  # a concurrent flush lands in between
+            store["version"] += 1
+            return False
+        assert version == store["version"]
+        store.update(terms=terms, errors=errors, version=version + 1)
+        return True
+
+    monkeypatch.setattr(trends, "get_trend_sketch", get)
+    monkeypatch.setattr(trends, "save_trend_sketch", save)
+    batch = SpaceSaving(capacity=10)
+    batch.offer("launch", 2)
+    assert merge_hour_sketch("e1", datetime(2026, 1, 1, 5), batch)
+    assert store["terms"] == {"rival": 8, "launch": 2}
+
+def test_summarize_counts_terms_of_new_items_only():
+    hour = datetime(2026, 1, 1, 5, 30)
+    new = [{"event_id": "e1", "platform": "reddit", "external_id": "a", "text": "rocket launch",
+            "created_at": hour, "metrics": {"score": 1}}]
+    updated = [{"event_id": "e1", "platform": "reddit", "external_id": "b", "text": "rocket boring",
+                "created_at": hour, "metrics": {"score": 99}}]
+    [(event_id, bucket, sketch, posts)] = summarize(new, updated)
+    assert (event_id, bucket) == ("e1", datetime(2026, 1, 1, 5))
+    assert sketch.counts == {"rocket": 1, "launch": 1}
+    assert [p["external_id"] for p in posts] == ["b", "a"]
+
+def test_merge_terms_sums_hours_and_excludes():
+    assert merge_terms([{"launch": 2, "rocket": 1}, {"rocket": 3}, None], 5, exclude={"launch"}) == [
+        {"term": "rocket", "count": 4},
+    ]
@@ -0,0 +1,112 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+import collector
+from collector import NewestSeen, resume_from
+from config import Config
+
+WINDOW_START = datetime(2026, 1, 1)
+
+@pytest.fixture
+def saved(monkeypatch):
+    """Watermark writes, recorded instead of sent to MongoDB"""
+    calls = []
+    monkeypatch.setattr(collector, "advance_watermark",
+                        lambda event_id, source, newest_at: calls.append(("advance", source, newest_at)))
+    monkeypatch.setattr(collector, "save_backfill",
+                        lambda event_id, source, cursor, pending: calls.append(("backfill", source, cursor, pending)))
+    return calls
+
+def test_resume_from_starts_an_overlap_before_the_watermark():
+    newest = WINDOW_START + timedelta(days=1)
+    assert resume_from(WINDOW_START, None) == WINDOW_START
+    assert resume_from(WINDOW_START, {"newest_at": newest}) == newest - timedelta(minutes=Config.WATERMARK_OVERLAP_MINUTES)
+    assert resume_from(WINDOW_START, {"newest_at": WINDOW_START}) == WINDOW_START
+
+def test_complete_walk_advances_the_watermark(saved):
+    newest = NewestSeen()
+    newest.see({"created_at": WINDOW_START + timedelta(hours=2)})
+    newest.see({"created_at": WINDOW_START + timedelta(hours=1)})
+    newest.save("e1", "reddit")
+    assert saved == [("advance", "reddit", WINDOW_START + timedelta(hours=2))]
+
+def test_truncated_walk_leaves_the_watermark_and_saves_a_cursor(saved):
+    newest = NewestSeen()
+    newest.see({"created_at": WINDOW_START + timedelta(hours=2)})
+    newest.save("e1", "youtube", cursor="PAGE2")
+    assert saved == [("backfill", "youtube", "PAGE2", WINDOW_START + timedelta(hours=2))]
+
+def test_backfill_resumes_and_then_advances_to_the_earlier_walks_newest(saved):
+    pending = WINDOW_START + timedelta(hours=5)
+    newest = NewestSeen({"newest_at": WINDOW_START, "cursor": "t3_old", "pending_newest_at": pending})
+    assert newest.cursor == "t3_old"
+    newest.see({"created_at": WINDOW_START + timedelta(hours=1)})
+    newest.save("e1", "reddit")
+    assert saved == [("advance", "reddit", pending)]
+
+class FakeWriter:
+    flush_counts = []
+    inserted = updated = 0
+
+    def __init__(self):
+        self.docs = []
+
+    def add(self, doc):
+        self.docs.append(doc)
+
+    def summary(self):
+        return {"inserted": len(self.docs), "updated": 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+def fake_reddit(submissions, seen_params):
+    def search(query, sort, time_filter, limit, params):
+        seen_params.append(params)
+        return iter(submissions[:limit] if limit else submissions)
+
+    client = SimpleNamespace(subreddit=lambda name: SimpleNamespace(search=search),
+                             auth=SimpleNamespace(limits={}))
+
+    @contextmanager
+    def borrow():
+        yield client
+    return borrow
+
+def submission(n, created):
+    return SimpleNamespace(id=f"p{n}", fullname=f"t3_p{n}", title=f"post {n}", selftext="",
+                           created_utc=(created - datetime(1970, 1, 1)).total_seconds(), score=1, num_comments=0)
+
+@pytest.fixture
+def reddit_env(monkeypatch, saved):
+    monkeypatch.setattr(Config, "REDDIT_CLIENT_ID", "id")
+    monkeypatch.setattr(Config, "REDDIT_CLIENT_SECRET", "secret")
+    monkeypatch.setattr(collector, "ingest_writer", lambda label, event_id: FakeWriter())
+    monkeypatch.setattr(collector, "ingest_scored", lambda writer, docs: len(docs))
+    return saved
+
+def test_reddit_walk_cut_off_by_the_item_cap_saves_where_it_stopped(monkeypatch, reddit_env):
+    end = datetime.utcnow()
+    posts = [submission(n, end - timedelta(minutes=n)) for n in range(10)]
+    params = []
+    monkeypatch.setattr(collector.clients, "reddit", fake_reddit(posts, params))
+    collector.reddit_fetch("e1", "q", end - timedelta(days=1), end, limit=5)
+    assert params == [None]
+    newest = datetime.utcfromtimestamp(posts[0].created_utc)
+    assert reddit_env == [("backfill", "reddit", "t3_p4", newest)]
+
+def test_reddit_walk_reaching_the_resume_point_advances(monkeypatch, reddit_env):
+    end = datetime.utcnow()
+    posts = [submission(n, end - timedelta(hours=n)) for n in range(5)]
+    params = []
+    monkeypatch.setattr(collector.clients, "reddit", fake_reddit(posts, params))
+    watermark = {"newest_at": end - timedelta(hours=2), "cursor": "t3_x", "pending_newest_at": end}
+    collector.reddit_fetch("e1", "q", end - timedelta(days=1), end, limit=100, watermark=watermark)
+    assert params == [{"after": "t3_x"}]
+    assert reddit_env == [("advance", "reddit", end)]
@@ -0,0 +1,183 @@
+import heapq
+import re
+from collections import defaultdict
+
+from config import Config
+from models import (
+    hour_bucket, update_top_posts, get_trend_sketch, save_trend_sketch, delete_trends, iter_tweets_for_event
+)
+
+_TOKEN = re.compile(r"[a-z][a-z0-9']+")
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are aren't as at be because been before being below
+between both but by can can't cannot could couldn't did didn't do does doesn't doing don't down during each few
+for from further get got had hadn't has hasn't have haven't having he he's her here here's hers herself him
+himself his how how's i i'm i've if in into is isn't it it's its itself just let's like me more most much
+mustn't my myself no nor not now of off on once one only or other ought our ours ourselves out over own
+really same shan't she she's should shouldn't so some still such than that that's the their theirs them
+themselves then there there's these they they're they've this those through to too under until up us very
+via was wasn't we we're we've were weren't what what's when when's where where's which while who who's whom
+why why's will with won't would wouldn't yes yet you you're you've your yours yourself yourselves
+http https www com amp
+""".split())
+
+def tokenize(text):
+    """Lowercase word tokens of text, minus stopwords and tokens under three letters"""
+    return [t for t in _TOKEN.findall((text or "").lower()) if len(t) >= 3 and t not in STOPWORDS]
+
+class SpaceSaving:
+    """Space-Saving heavy-hitter sketch: the (approximate) most frequent items in bounded memory.
+
+    Holds at most capacity counters. An unseen item evicts the smallest
+    counter and inherits its count, so counts overestimate by at most that
+    inherited error, and any item more frequent than total / capacity is
+    guaranteed to be present.
+    """
+
+    def __init__(self, capacity=None, counts=None, errors=None):
+        self.capacity = capacity or Config.TRENDS_SKETCH_SIZE
+        self.counts = dict(counts or {})
+        self.errors = {item: (errors or {}).get(item, 0) for item in self.counts}
+
+    def offer(self, item, count=1):
+        if item in self.counts:
+            self.counts[item] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = count
+            self.errors[item] = 0
+        else:
+            victim = min(self.counts, key=self.counts.get)
+            floor = self.counts.pop(victim)
+            del self.errors[victim]
+            self.counts[item] = floor + count
+            self.errors[item] = floor
+
+    def floor(self):
+        """The most an item the sketch doesn't hold can have been seen: its smallest counter once full"""
+        return min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+
+    def merge(self, other):
+        """Fold another sketch into this one, keeping the capacity largest counters.
+
+        An item held by only one side is charged the other side's floor,
+        as count and as error, as a single offer() would inherit an evicted
+        counter. So a term arriving once per flush climbs past terms
+        stored long ago instead of being trimmed each time, and the merged
+        sketch keeps the heavy-hitter guarantee.
+        """
+        floor, other_floor = self.floor(), other.floor()
+        counts, errors = {}, {}
+        for item in self.counts.keys() | other.counts.keys():
+            mine, theirs = item in self.counts, item in other.counts
+            counts[item] = (self.counts[item] if mine else floor) + (other.counts[item] if theirs else other_floor)
+            errors[item] = ((self.errors[item] if mine else floor)
+                            + (other.errors[item] if theirs else other_floor))
+        kept = heapq.nlargest(self.capacity, counts, key=counts.get)
+        self.counts = {item: counts[item] for item in kept}
+        self.errors = {item: errors[item] for item in kept}
+        return self
+
+    def top(self, n=None):
+        ranked = sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)
+        return ranked[:n] if n else ranked
+
+def post_summary(doc):
+    """The fields of an item kept in an hour's top posts"""
+    metrics = doc.get("metrics") or {}
+    return {
+        "platform": doc.get("platform"),
+        "external_id": doc.get("external_id"),
+        "text": (doc.get("text") or "")[:280],
+        "created_at": doc.get("created_at"),
+        "sentiment": doc.get("sentiment"),
+        "score": metrics.get("score") or 0,
+        "num_comments": metrics.get("num_comments") or 0,
+    }
+
+def summarize(docs, updated_docs=()):
+    """Per-(event, hour) term sketches and top-post candidates for a batch of items.
+
+    Returns (event_id, bucket, SpaceSaving or None, [post, ...]) tuples.
+    Terms are counted for new docs only; updated_docs (items stored
+    before) just re-rank as top posts with their current score.
+    """
+    sketches = defaultdict(SpaceSaving)
+    posts = defaultdict(dict)
+    for doc, new in [(d, True) for d in docs] + [(d, False) for d in updated_docs]:
+        created = doc.get("created_at")
+        # GDELT points are synthetic daily volumes, not posts
+        if not created or doc.get("platform") == "news":
+            continue
+        key = (doc.get("event_id"), hour_bucket(created))
+        if new:
+            sketch = sketches[key]
+            for term in tokenize(doc.get("text")):
+                sketch.offer(term)
+        posts[key][doc.get("external_id")] = post_summary(doc)
+
+    summaries = []
+    for key in sketches.keys() | posts.keys():
+        best = heapq.nlargest(Config.TRENDS_TOP_POSTS, posts.get(key, {}).values(),
+                              key=lambda p: (p["score"], p["num_comments"]))
+        summaries.append((*key, sketches.get(key), best))
+    return summaries
+
+def merge_hour_sketch(event_id, bucket, sketch, attempts=5):
+    """Merge a batch's term sketch into the stored one for (event_id, bucket).
+
+    The stored sketch holds Config.TRENDS_TERMS_KEPT terms. Concurrent
+    writers are resolved by re-reading and merging again.
+    """
+    for _ in range(attempts):
+        terms, errors, version = get_trend_sketch(event_id, bucket)
+        stored = SpaceSaving(Config.TRENDS_TERMS_KEPT, terms, errors).merge(sketch)
+        if save_trend_sketch(event_id, bucket, stored.counts, stored.errors, version):
+            return True
+    print(f"⚠️  Trends for {event_id} at {bucket} kept changing; dropped {len(sketch.counts)} terms")
+    return False
+
+def record_trends(docs, updated_docs=()):
+    """Ingest stage: fold newly written items, and re-collected ones' scores, into the per-hour trends"""
+    summaries = summarize(docs, updated_docs)
+    for event_id, bucket, sketch, _ in summaries:
+        if sketch is not None and sketch.counts:
+            merge_hour_sketch(event_id, bucket, sketch)
+    update_top_posts([(event_id, bucket, posts) for event_id, bucket, _, posts in summaries])
+    return len(summaries)
+
+def merge_terms(term_maps, n, exclude=()):
+    """Sum per-hour term counts and return the n largest as [{"term", "count"}]"""
+    totals = defaultdict(int)
+    for terms in term_maps:
+        for term, count in (terms or {}).items():
+            if term not in exclude:
+                totals[term] += count
+    return [{"term": t, "count": c} for t, c in heapq.nlargest(n, totals.items(), key=lambda kv: kv[1])]
+
+def rebuild_trends(event_id, batch_size=1000):
+    """Recompute an event's trends from its stored items"""
+    delete_trends(event_id)
+    fields = ["event_id", "platform", "external_id", "text", "created_at", "sentiment", "metrics"]
+    batch, total = [], 0
+    for doc in iter_tweets_for_event(event_id, fields):
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            record_trends(batch)
+            total += len(batch)
+            batch = []
+    record_trends(batch)
+    return total + len(batch)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Trending terms maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rebuild = sub.add_parser("rebuild", help="Recompute an event's trends from its stored items")
+    rebuild.add_argument("--event-id", required=True)
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        n = rebuild_trends(args.event_id)
+        print(f"✅ Rebuilt trends from {n} items")